@@ -9,15 +9,56 @@ import json
 import os
 import time
 import threading
-import concurrent.futures
+import base64
 from datetime import datetime
 from typing import Dict, Any
 from enum import Enum
 import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # from streamlit_local_storage import LocalStorage  # 暂时禁用，有bug
 import streamlit.components.v1 as components
 
+try:
+    import uvloop  # 可选：更快的事件循环，仅用于后台研究线程
+except ImportError:
+    uvloop = None
+
+try:
+    import orjson  # 可选：更快地解析/写出历史记录JSON
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard  # 可选：压缩持久化的历史记录
+except ImportError:
+    zstandard = None
+
+# 历史记录JSON解析函数，orjson的解析错误同样是json.JSONDecodeError的子类
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+def _is_usable(value):
+    """判断存储值是否有效（非空、非"null"、非纯空白），字符串不做额外拷贝"""
+    if isinstance(value, str):
+        return bool(value) and value != "null" and not value.isspace()
+    return bool(value)
+
+
+def _pack_history(json_string):
+    """把历史JSON压缩为zstd+base64文本，未安装zstandard时返回None"""
+    if zstandard is None:
+        return None
+    # 压缩器对象不能跨线程共用（各会话的脚本线程并发运行），每次调用新建
+    compressor = zstandard.ZstdCompressor(level=3)
+    return base64.b64encode(compressor.compress(json_string.encode("utf-8"))).decode("ascii")
+
+
+def _unpack_history(packed):
+    """还原_pack_history压缩的历史JSON"""
+    return zstandard.ZstdDecompressor().decompress(base64.b64decode(packed)).decode("utf-8")
+
+
 class SafeLocalStorage:
     """安全的LocalStorage实现，使用session state作为主要存储"""
     
@@ -29,8 +70,8 @@ class SafeLocalStorage:
         """从文件缓存加载数据"""
         try:
             if os.path.exists(self._cache_file):
-                with open(self._cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self._cache_file, 'rb') as f:
+                    return _json_loads(f.read())
         except Exception:
             pass
         return {}
@@ -38,34 +79,80 @@ class SafeLocalStorage:
     def _save_to_file_cache(self, data):
         """保存数据到文件缓存"""
         try:
-            with open(self._cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+            with open(self._cache_file, 'wb') as f:
+                f.write(payload)
         except Exception:
             pass
     
+    def _update_file_cache(self, key, value, remove=False):
+        """读取文件缓存，更新或删除单个键后写回（在后台写入线程中执行）"""
+        try:
+            file_cache = self._load_from_file_cache()
+            if remove:
+                if key not in file_cache:
+                    return
+                del file_cache[key]
+            else:
+                file_cache[key] = value
+            self._save_to_file_cache(file_cache)
+        except Exception:
+            pass  # 文件缓存失败不影响主要功能
+    
+    def bootstrap_from_file(self):
+        """一次性读取文件缓存，把数据填充到session state的预置槽位"""
+        if st.session_state.get("_file_cache_loaded"):
+            return
+        
+        file_cache = self._load_from_file_cache()
+        for cache_key, cache_value in file_cache.items():
+            session_key = f"ls_{cache_key}"
+            if session_key not in st.session_state and _is_usable(cache_value):
+                st.session_state[session_key] = cache_value
+        st.session_state._file_cache_loaded = True
+    
+    def get_api_key(self):
+        """获取API密钥（直接读取引导后的session state槽位）"""
+        return st.session_state.get("ls_api_key")
+    
+    def get_research_results(self):
+        """获取研究历史（直接读取引导后的session state槽位），优先读取压缩版本"""
+        packed = st.session_state.get("ls_research_results_z")
+        if zstandard is not None and _is_usable(packed):
+            try:
+                return _unpack_history(packed)
+            except Exception:
+                pass  # 压缩数据损坏时退回未压缩版本
+        return st.session_state.get("ls_research_results")
+    
+    def set_research_results(self, json_string):
+        """保存完整历史；安装了zstandard时压缩后存为research_results_z"""
+        packed = _pack_history(json_string)
+        if packed is None:
+            return self.setItem("research_results", json_string)
+        if not self.setItem("research_results_z", packed):
+            return False
+        # 旧版未压缩的历史不再需要，每个会话只清理一次
+        if not st.session_state.get("_legacy_history_removed"):
+            self.removeItem("research_results")
+            st.session_state._legacy_history_removed = True
+        return True
+    
+    def clear_research_results(self):
+        """删除所有形式保存的研究历史（含压缩版本）"""
+        self.removeItem("research_results")
+        self.removeItem("research_results_z")
+    
     def getItem(self, key, default=None):
         """从session state或文件缓存获取数据"""
-        # 首先检查session state缓存
-        session_key = f"ls_{key}"
-        if session_key in st.session_state:
-            cached_value = st.session_state[session_key]
-            if cached_value is not None and cached_value != "null" and str(cached_value).strip() != "":
-                return cached_value
+        self.bootstrap_from_file()
         
-        # 如果session state中没有，尝试从文件缓存加载
-        if not hasattr(st.session_state, '_file_cache_loaded'):
-            file_cache = self._load_from_file_cache()
-            if file_cache:
-                for cache_key, cache_value in file_cache.items():
-                    if cache_value is not None and str(cache_value).strip() != "":
-                        st.session_state[f"ls_{cache_key}"] = cache_value
-                st.session_state._file_cache_loaded = True
-                
-                # 再次检查session state
-                if session_key in st.session_state:
-                    cached_value = st.session_state[session_key]
-                    if cached_value is not None and cached_value != "null" and str(cached_value).strip() != "":
-                        return cached_value
+        cached_value = st.session_state.get(f"ls_{key}")
+        if _is_usable(cached_value):
+            return cached_value
         
         # 如果都没有，返回默认值
         return default
@@ -73,18 +160,19 @@ class SafeLocalStorage:
     def setItem(self, key, value):
         """向LocalStorage、session state和文件缓存保存数据"""
         try:
-            # 缓存到session state
             session_key = f"ls_{key}"
+            
+            # 值未变化时跳过文件写入和脚本注入（session state在引导时已与文件缓存对齐）
+            if st.session_state.get(session_key) == value:
+                self._cache[key] = value
+                return True
+            
+            # 缓存到session state
             st.session_state[session_key] = value
             self._cache[key] = value
             
-            # 保存到文件缓存
-            try:
-                file_cache = self._load_from_file_cache()
-                file_cache[key] = value
-                self._save_to_file_cache(file_cache)
-            except Exception:
-                pass  # 文件缓存失败不影响主要功能
+            # 保存到文件缓存（后台写入，不阻塞结果显示）
+            get_file_cache_writer().submit(self._update_file_cache, key, value)
             
             # 使用HTML/JS方法保存到浏览器LocalStorage
             if isinstance(value, str):
@@ -128,13 +216,7 @@ class SafeLocalStorage:
                 del st.session_state[session_key]
             
             # 从文件缓存中删除
-            try:
-                file_cache = self._load_from_file_cache()
-                if key in file_cache:
-                    del file_cache[key]
-                    self._save_to_file_cache(file_cache)
-            except Exception:
-                pass  # 文件缓存失败不影响主要功能
+            get_file_cache_writer().submit(self._update_file_cache, key, None, True)
             
             # 使用HTML/JS方法从浏览器LocalStorage中删除
             html_code = f"""
@@ -154,13 +236,23 @@ class SafeLocalStorage:
             st.warning(f"从LocalStorage删除失败: {e}")
             return False
 
+
+def get_local_storage():
+    """获取当前会话复用的SafeLocalStorage实例"""
+    if "_local_storage" not in st.session_state:
+        st.session_state._local_storage = SafeLocalStorage()
+    return st.session_state._local_storage
+
+
 # 导入核心组件
-from core.research_engine import ResearchEngine
-from core.state_manager import TaskStatus
 from utils.debug_logger import enable_debug, disable_debug, get_debug_logger
+from utils.helpers import format_task_time, truncate_json
 from utils.streamlit_helpers import (
-    json_serializable,
-    create_markdown_content,
+    json_serializable_bytes,
+    markdown_table,
+    get_export_json,
+    get_export_json_zst,
+    get_export_markdown,
     display_task_analysis,
     display_search_results,
     display_final_answer,
@@ -174,6 +266,56 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# 历史记录每页显示条数
+HISTORY_PAGE_SIZE = 20
+
+# 历史记录最多保留条数，超出后丢弃最早的记录
+MAX_HISTORY_RESULTS = 50
+
+# 单次研究任务的最长运行时间（秒）
+RESEARCH_TIMEOUT = 600
+
+# 点击停止后等待后台任务收尾的最长时间（秒），超时后由开始按钮继续把关
+RESEARCH_STOP_WAIT = 1.0
+
+# 研究进行中进度fragment的刷新间隔（秒）
+PROGRESS_POLL_INTERVAL = 0.25
+
+# 进度消息最多保留条数，以及思考过程中显示的最近条数
+MAX_PROGRESS_MESSAGES = 500
+PROGRESS_DISPLAY_TAIL = 50
+
+# 后台进度消息去重时参考的最近消息条数
+RECENT_MESSAGE_WINDOW = 8
+
+# 后台进度消息合并送往界面的最小间隔（秒）
+PROGRESS_FLUSH_INTERVAL = 0.1
+
+# "清空会话"时重置的状态及其默认值
+_RESET_DEFAULTS = {
+    "research_results": [],
+    "current_task": None,
+    "is_researching": False,
+    "research_complete": False,
+    "research_error": None,
+    "current_step": "",
+    "progress_percentage": 0,
+    "research_started": False,
+    "just_completed": False,
+    "show_markdown_preview": False,
+    "history_loaded": False,
+    "answer_buffer": "",
+}
+
+# "清空会话"时直接移除的状态（缓存和一次性标记）
+_RESET_REMOVE_KEYS = (
+    "first_load_message_shown", "ls_research_results", "ls_research_results_z", "ls_api_key",
+    "_history_json_cache", "_history_labels", "current_research_id",
+)
+
+# 工作流步骤状态对应的图标
+_STATUS_ICON = {"completed": "✅", "running": "🔄", "failed": "❌", "info": "ℹ️", "decision": "🤔"}
+
 # 可用的模型列表（基于测试结果更新）
 AVAILABLE_MODELS = {
     "gemini-2.0-flash": "🚀 Gemini 2.0 Flash - 便宜最快",
@@ -181,86 +323,49 @@ AVAILABLE_MODELS = {
     "gemini-2.5-pro-preview-06-05": "💫 Gemini 2.5 Pro - 0605最新"
 }
 
-# 自定义CSS样式
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        text-align: center;
-        margin-bottom: 2rem;
-        background: linear-gradient(90deg, #1f77b4, #ff7f0e);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    .thinking-box {
-        padding: 1rem;
-        margin: 1rem 0;
-        border-radius: 10px;
-        background-color: #f0f8ff;
-        border-left: 4px solid #4169e1;
-        animation: pulse 2s infinite;
-    }
-    
-    @keyframes pulse {
-        0% { opacity: 0.8; }
-        50% { opacity: 1; }
-        100% { opacity: 0.8; }
-    }
-    
-    .progress-step {
-        padding: 0.5rem;
-        margin: 0.2rem 0;
-        border-radius: 5px;
-        background-color: #f8f9fa;
-        border-left: 3px solid #28a745;
-    }
-</style>
-""", unsafe_allow_html=True)
+
+# 会话状态的不可变默认值
+_SESSION_DEFAULTS = {
+    "research_engine": None,
+    "current_task": None,
+    "answer_buffer": "",        # 流式生成中的答案
+    "api_key_validated": False,
+    "is_researching": False,
+    "current_step": "",
+    "progress_percentage": 0,
+    "model_name": "gemini-2.0-flash",
+    "research_complete": False,
+    "research_error": None,
+    "research_started": False,  # 添加执行标记
+    "just_completed": False,    # 刚刚完成标记
+    "debug_enabled": False,     # debug模式开关
+    "show_markdown_preview": False  # markdown预览开关
+}
 
 
 def initialize_session_state():
-    """初始化会话状态"""
-    defaults = {
-        "research_engine": None,
-        "current_task": None,
-        "research_results": [],
-        "progress_messages": [],
-        "api_key_validated": False,
-        "is_researching": False,
-        "current_step": "",
-        "progress_percentage": 0,
-        "model_name": "gemini-2.0-flash",
-        "research_complete": False,
-        "research_error": None,
-        "research_started": False,  # 添加执行标记
-        "just_completed": False,    # 刚刚完成标记
-        "debug_enabled": False,     # debug模式开关
-        "show_markdown_preview": False  # markdown预览开关
-    }
+    """初始化会话状态（每个会话只执行一次）"""
+    if st.session_state.get("_session_initialized"):
+        return
     
-    for key, default_value in defaults.items():
+    for key, default_value in _SESSION_DEFAULTS.items():
         if key not in st.session_state:
             st.session_state[key] = default_value
+    # 可变默认值每个会话单独创建
+    st.session_state.setdefault("research_results", [])
+    st.session_state.setdefault("progress_messages", deque(maxlen=MAX_PROGRESS_MESSAGES))
+    st.session_state._session_initialized = True
 
     # 初始化LocalStorage数据加载
     initialize_from_localstorage()
 
     # 尝试从LocalStorage加载API密钥
     try:
-        if "ls_api_key" not in st.session_state:
-            localS = SafeLocalStorage()
-            initial_api_key = localS.getItem("api_key")
-            st.session_state.ls_api_key = initial_api_key
-        else:
-            initial_api_key = st.session_state.ls_api_key
+        localS = get_local_storage()
+        localS.bootstrap_from_file()
+        initial_api_key = localS.get_api_key()
             
-        if (initial_api_key and 
-            initial_api_key != "null" and 
-            initial_api_key != None and
-            str(initial_api_key).strip() != ""):
+        if _is_usable(initial_api_key):
             st.session_state.api_key_to_load = initial_api_key
     except Exception:
         pass  # 忽略LocalStorage加载错误
@@ -330,12 +435,15 @@ def validate_and_setup_engine(api_key: str, model_name: str) -> bool:
         return False
     
     try:
-        if (st.session_state.research_engine is None or 
-            st.session_state.model_name != model_name):
-            
-            engine = ResearchEngine(api_key, model_name)
-            st.session_state.research_engine = engine
-            st.session_state.model_name = model_name
+        # 引擎带有会话状态，保存在本会话中；只有密钥或模型变化时才重建
+        engine_key = (api_key, model_name)
+        if (st.session_state.research_engine is None or
+                st.session_state.get("_engine_key") != engine_key):
+            # 延迟导入：引擎及google-genai等依赖较重，首次需要引擎时才加载
+            from core.research_engine import ResearchEngine
+            st.session_state.research_engine = ResearchEngine(api_key, model_name)
+            st.session_state._engine_key = engine_key
+        st.session_state.model_name = model_name
             
         return True
     except Exception as e:
@@ -343,11 +451,22 @@ def validate_and_setup_engine(api_key: str, model_name: str) -> bool:
         return False
 
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def _model_config_text(search_model, analysis_model, reflection_model, answer_model):
+    """拼接模型配置详情文本，同一组模型只生成一次"""
+    return "\n".join([
+        f"🔍 搜索: {search_model}",
+        f"📊 分析: {analysis_model}",
+        f"🤔 反思: {reflection_model}",
+        f"📝 答案: {answer_model}",
+    ])
+
+
 def setup_api_key():
     """设置API密钥和模型选择"""
     st.sidebar.header("🔧 配置")
     
-    localS = SafeLocalStorage()
+    localS = get_local_storage()
     
     # 模型选择
     model_name = st.sidebar.selectbox(
@@ -386,10 +505,12 @@ def setup_api_key():
             if st.session_state.research_engine:
                 model_config = st.session_state.research_engine.model_config
                 with st.sidebar.expander("📋 模型配置详情", expanded=False):
-                    st.text(f"🔍 搜索: {model_config.search_model}")
-                    st.text(f"📊 分析: {model_config.task_analysis_model}")
-                    st.text(f"🤔 反思: {model_config.reflection_model}")
-                    st.text(f"📝 答案: {model_config.answer_model}")
+                    st.text(_model_config_text(
+                        model_config.search_model,
+                        model_config.task_analysis_model,
+                        model_config.reflection_model,
+                        model_config.answer_model,
+                    ))
             
             # Debug开关
             st.sidebar.divider()
@@ -434,15 +555,13 @@ def setup_api_key():
                             by_type = api_stats.get("by_type", {})
                             if by_type:
                                 st.markdown("**请求类型分布:**")
-                                for req_type, count in by_type.items():
-                                    st.text(f"• {req_type}: {count}")
+                                st.markdown(markdown_table(["类型", "次数"], by_type.items()))
                             
                             # 按模型统计
                             by_model = api_stats.get("by_model", {})
                             if by_model:
                                 st.markdown("**模型使用分布:**")
-                                for model, count in by_model.items():
-                                    st.text(f"• {model}: {count}")
+                                st.markdown(markdown_table(["模型", "次数"], by_model.items()))
                             
                             st.divider()
                             
@@ -473,16 +592,16 @@ def setup_api_key():
                             step_sequence = workflow_stats.get("step_sequence", [])
                             if step_sequence:
                                 st.markdown("**执行序列:**")
-                                for i, step in enumerate(step_sequence, 1):
-                                    st.text(f"{i}. {step}")
+                                st.markdown(markdown_table(["#", "步骤"], enumerate(step_sequence, 1)))
                             
                             # 步骤耗时
                             step_durations = workflow_stats.get("step_durations", {})
                             if step_durations:
                                 st.markdown("**步骤耗时:**")
-                                for step, duration in step_durations.items():
-                                    if duration > 0:
-                                        st.text(f"• {step}: {duration:.2f}s")
+                                st.markdown(markdown_table(
+                                    ["步骤", "耗时"],
+                                    [(step, f"{duration:.2f}s") for step, duration in step_durations.items() if duration > 0]
+                                ))
                             
                             st.divider()
                             
@@ -498,13 +617,13 @@ def setup_api_key():
                                 st.metric("错误总数", error_stats.get("total", 0))
                                 by_error_type = error_stats.get("by_type", {})
                                 if by_error_type:
-                                    for error_type, count in by_error_type.items():
-                                        st.text(f"• {error_type}: {count}")
+                                    st.markdown(markdown_table(["错误类型", "次数"], by_error_type.items()))
                     
                     # 立即保存按钮
                     if st.sidebar.button("💾 保存Debug日志"):
-                        debug_logger.save_now()
-                        st.sidebar.success("✅ Debug日志已保存")
+                        # 写文件交给后台线程，不阻塞当前脚本
+                        get_debug_io_pool().submit(debug_logger.save_now)
+                        st.toast("💾 Debug日志保存中…")
                     
                     # 查看详细日志按钮
                     if st.sidebar.button("📋 查看详细日志"):
@@ -517,72 +636,419 @@ def setup_api_key():
 
 
 def display_real_time_progress():
-    """显示实时进度"""
+    """显示实时进度（当前步骤、进度条和思考过程合并在一个st.status组件中）"""
     if st.session_state.is_researching and st.session_state.progress_messages:
-        
-        # 显示当前步骤
-        if st.session_state.current_step:
-            st.markdown(f'''
-            <div class="thinking-box">
-                🤔 <strong>{st.session_state.current_step}</strong>
-            </div>
-            ''', unsafe_allow_html=True)
-        
-        # 显示进度条
-        if st.session_state.progress_percentage > 0:
-            st.progress(st.session_state.progress_percentage / 100)
-        
-        # 显示思考过程
-        with st.expander("📝 思考过程", expanded=True):
-            for i, msg in enumerate(st.session_state.progress_messages, 1):
-                st.markdown(f'<div class="progress-step">{i}. {msg}</div>', 
-                          unsafe_allow_html=True)
+        label = f"🤔 {st.session_state.current_step}" if st.session_state.current_step else "🔄 研究进行中..."
+        with st.status(label, state="running", expanded=True):
+            # 显示进度条
+            if st.session_state.progress_percentage > 0:
+                st.progress(st.session_state.progress_percentage / 100)
+            
+            # 显示思考过程（只渲染最近的若干条）
+            messages = list(st.session_state.progress_messages)[-PROGRESS_DISPLAY_TAIL:]
+            start = len(st.session_state.progress_messages) - len(messages) + 1
+            st.markdown("\n".join(f"{i}. {msg}" for i, msg in enumerate(messages, start)))
+
 
+@st.cache_resource
+def get_debug_io_pool():
+    """获取保存Debug日志用的线程池（进程内共用）"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="debug-io")
 
-def run_research_in_background(
-    engine, user_query, max_search_rounds, effort_level, num_search_queries, q, stop_event
+
+@st.cache_resource
+def get_file_cache_writer():
+    """获取写文件缓存的单线程执行器，读改写按提交顺序串行执行"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-cache")
+
+
+@st.cache_resource
+def get_research_loop():
+    """获取常驻后台线程上的事件循环（进程内只创建一次，所有研究任务共用）"""
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="research-loop", daemon=True).start()
+    return loop
+
+
+async def run_research_in_background(
+    engine, user_query, max_search_rounds, effort_level, num_search_queries, q, done_event
 ):
-    """在后台线程中运行研究任务"""
+    """在后台事件循环中运行研究任务，进度通过队列传回脚本线程；任务真正结束后设置done_event"""
+    loop = asyncio.get_running_loop()
+    # 进度消息先在本地缓冲，最多每PROGRESS_FLUSH_INTERVAL秒合并成一条放入队列
+    pending = []
+    flush_state = {"last": 0.0, "timer": None, "percentage": None}
+    # 最近出现过的消息（哈希），重复的消息只更新进度值，不再追加
+    recent_messages = deque(maxlen=RECENT_MESSAGE_WINDOW)
+
+    def is_repeated(message):
+        h = hash(message)
+        if h in recent_messages:
+            return True
+        recent_messages.append(h)
+        return False
+
+    def flush_progress():
+        if flush_state["timer"] is not None:
+            flush_state["timer"].cancel()
+            flush_state["timer"] = None
+        if pending or flush_state["percentage"] is not None:
+            q.put({"type": "progress_batch", "messages": pending[:], "percentage": flush_state["percentage"]})
+            pending.clear()
+            flush_state["percentage"] = None
+        flush_state["last"] = time.monotonic()
+
     try:
-        # 为这个线程创建一个新的事件循环
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
+        # 停止由future.cancel()触发的CancelledError完成，回调里不再检查停止标记
         def progress_callback(message, percentage):
-            if stop_event.is_set():
-                engine.stop_research()
-                raise Exception("用户请求停止")
-            q.put({"type": "progress", "message": message, "percentage": percentage})
+            flush_state["percentage"] = percentage
+            if percentage >= 100 or not is_repeated(message):
+                pending.append((message, percentage))
+            if percentage >= 100 or time.monotonic() - flush_state["last"] >= PROGRESS_FLUSH_INTERVAL:
+                flush_progress()
+            elif flush_state["timer"] is None:
+                # 之后没有新消息时也保证缓冲按时送出
+                flush_state["timer"] = loop.call_later(PROGRESS_FLUSH_INTERVAL, flush_progress)
 
         def step_callback(message):
-            if stop_event.is_set():
-                engine.stop_research()
-                raise Exception("用户请求停止")
+            if is_repeated(message):
+                return
+            flush_progress()
             q.put({"type": "step", "message": message})
             
         def error_callback(message):
+            flush_progress()
             q.put({"type": "error", "message": message})
 
+        def answer_callback(text):
+            q.put({"type": "answer_chunk", "text": text})
+
         engine.set_callbacks(
             progress_callback=progress_callback,
             step_callback=step_callback,
             error_callback=error_callback,
+            answer_callback=answer_callback,
         )
         
         # 重置引擎的停止标记
         engine.reset_stop_flag()
 
-        # 运行异步研究方法
-        results = loop.run_until_complete(
+        # 运行异步研究方法；超时由一个call_later定时器取消任务，不再经过wait_for包装
+        research_task = loop.create_task(
             engine.research(user_query, max_search_rounds, effort_level, num_search_queries)
         )
+        timeout_handle = loop.call_later(RESEARCH_TIMEOUT, research_task.cancel)
+        try:
+            results = await research_task
+        except asyncio.CancelledError:
+            # 定时器未到期说明是用户停止，原样向上传递
+            if loop.time() < timeout_handle.when():
+                raise
+            raise asyncio.TimeoutError from None
+        finally:
+            timeout_handle.cancel()
+        flush_progress()
         q.put({"type": "result", "data": results})
         
+    except asyncio.TimeoutError:
+        flush_progress()
+        q.put({"type": "error", "message": f"研究超时（超过{RESEARCH_TIMEOUT // 60}分钟），已终止"})
     except Exception as e:
-        if "用户请求停止" not in str(e):
-            error_msg = f"研究过程中发生严重错误: {str(e)}"
-            q.put({"type": "error", "message": error_msg})
-        # 如果是用户停止，回调中已经处理了，这里不需要重复发送消息
+        flush_progress()
+        error_msg = f"研究过程中发生严重错误: {str(e)}"
+        q.put({"type": "error", "message": error_msg})
+    finally:
+        # future被取消时会立即显示完成，这里才代表循环上的任务（含被取消的搜索）已全部收尾
+        done_event.set()
+
+
+def history_label(result, fallback_id="history"):
+    """获取历史记录expander的标题，按task_id缓存（结果完成后标题不再变化）"""
+    labels = st.session_state.setdefault("_history_labels", {})
+    task_id = result.get("task_id")
+    label = labels.get(task_id) if task_id else None
+    if label is None:
+        label_id = task_id or fallback_id
+        label = f"**{result.get('user_query', '未知查询')}** - {format_task_time(label_id)} ({label_id[:20]})"
+        if task_id:
+            labels[task_id] = label
+    return label
+
+
+def index_history_labels(results):
+    """加载或追加历史记录时一次性生成标题"""
+    for result in results:
+        history_label(result)
+
+
+def forget_history_entries(results):
+    """历史记录被裁剪或清空时，一并删除这些记录的标题缓存和展开标记"""
+    labels = st.session_state.get("_history_labels", {})
+    for result in results:
+        task_id = result.get("task_id")
+        if task_id:
+            labels.pop(task_id, None)
+            st.session_state.pop(f"opened_{task_id}", None)
+
+
+def append_history_json(result):
+    """把新结果追加到逐条缓存的历史JSON中，只序列化新增的一条，并裁掉超出上限的旧记录"""
+    results = st.session_state.research_results
+    entries = st.session_state.get("_history_json_cache")
+    
+    # 缓存条数与当前历史（已包含新结果）对不上时整体重新序列化
+    if entries is None or len(entries) != len(results) - 1:
+        entries = [json_serializable_bytes(r).decode("utf-8") for r in results]
+    else:
+        entries.append(json_serializable_bytes(result).decode("utf-8"))
+    
+    # 会话中的历史与持久化内容同步裁剪，存储大小保持有界
+    if len(entries) > MAX_HISTORY_RESULTS:
+        del entries[:-MAX_HISTORY_RESULTS]
+        forget_history_entries(results[:-MAX_HISTORY_RESULTS])
+        del results[:-MAX_HISTORY_RESULTS]
+    
+    st.session_state._history_json_cache = entries
+    return "[" + ",".join(entries) + "]"
+
+
+def drain_research_queue():
+    """将后台队列中的消息同步到会话状态"""
+    q = st.session_state.get("queue")
+    if q is None:
+        return
+
+    while True:
+        try:
+            item = q.get_nowait()
+        except queue.Empty:
+            break
+
+        if item["type"] == "progress_batch":
+            st.session_state.progress_messages.extend(
+                f"[{percentage:.1f}%] {message}" for message, percentage in item["messages"]
+            )
+            if item["percentage"] is not None:
+                st.session_state.progress_percentage = item["percentage"]
+        elif item["type"] == "answer_chunk":
+            st.session_state.answer_buffer += item["text"]
+        elif item["type"] == "step":
+            st.session_state.current_step = item["message"]
+            st.session_state.progress_messages.append(f"⚡ {item['message']}")
+        elif item["type"] == "result":
+            st.session_state.is_researching = False
+            st.session_state.research_complete = True
+            st.session_state.current_task = item["data"]
+            st.session_state.answer_buffer = ""
+            st.session_state.research_results.append(item["data"])
+            index_history_labels([item["data"]])
+            st.session_state.just_completed = True
+            
+            # 保存到LocalStorage
+            try:
+                localS = get_local_storage()
+                json_string = append_history_json(item["data"])
+                success = localS.set_research_results(json_string)
+                if not success:
+                    st.warning("⚠️ 保存历史记录到LocalStorage失败")
+            except Exception as e:
+                st.warning(f"⚠️ 保存历史记录失败: {e}")
+                import traceback
+                st.error(f"详细错误: {traceback.format_exc()}")
+
+        elif item["type"] == "error":
+            st.session_state.is_researching = False
+            st.session_state.research_error = item["message"]
+        elif item["type"] == "info": # 用于处理用户停止等情况
+            st.session_state.is_researching = False
+            st.info(item["message"])
+
+
+def finish_research():
+    """后台任务结束后处理剩余消息；没有收到结果或错误时从future中取异常"""
+    drain_research_queue()
+
+    if st.session_state.is_researching:
+        # 任务已结束，但队列中没有结果消息，说明可能发生意外
+        future = st.session_state.get("current_task_future")
+        try:
+            # 尝试获取结果，这会重新引发在后台任务中发生的任何异常
+            if future:
+                future.result()
+            st.session_state.research_error = "研究意外终止，但未报告明确错误。"
+        except Exception as e:
+            # 捕获到后台任务的异常
+            st.session_state.research_error = f"研究任务在后台发生错误: {e}"
+        st.session_state.is_researching = False
+
+
+@st.fragment(run_every=PROGRESS_POLL_INTERVAL)
+def research_progress_fragment():
+    """定时刷新研究进度，只重跑这一小块；任务结束后触发一次整页rerun"""
+    drain_research_queue()
+
+    future = st.session_state.get("current_task_future")
+    if not st.session_state.is_researching or future is None or future.done():
+        finish_research()
+        # 研究结束，刷新整页以显示最终结果
+        st.rerun()
+
+    display_real_time_progress()
+
+    # 最终答案生成中时显示已收到的部分
+    if st.session_state.answer_buffer:
+        st.markdown("### 🎯 研究结果（生成中）")
+        st.markdown(st.session_state.answer_buffer)
+
+
+def _debug_row(category, record):
+    """提取Debug记录中用于表格显示的字段"""
+    if category == "api_requests":
+        response = record.get("response") or {}
+        return {
+            "时间": record.get("timestamp"),
+            "类型": record.get("request_type"),
+            "上下文": record.get("context"),
+            "模型": record.get("model"),
+            "Prompt长度": record.get("full_prompt_length", 0),
+            "响应长度": response.get("full_response_length"),
+            "耗时(s)": response.get("duration"),
+            "状态": response.get("status", record.get("status")),
+        }
+    if category == "search_results":
+        return {
+            "时间": record.get("timestamp"),
+            "查询": record.get("query"),
+            "类型": record.get("search_type"),
+            "成功": record.get("success", False),
+            "内容长度": record.get("content_length", 0),
+            "引用数": record.get("citations_count", 0),
+            "URL数": record.get("urls_count", 0),
+            "耗时(s)": record.get("duration", 0),
+        }
+    if category == "workflow_steps":
+        step_status = record.get("step_status", "unknown")
+        status_icon = _STATUS_ICON.get(step_status, "❓")
+        return {
+            "时间": record.get("timestamp"),
+            "步骤名": f"{status_icon} {record.get('step_name', 'unknown')}",
+            "状态": step_status,
+            "耗时(s)": record.get("duration") or 0,
+            "错误": record.get("error_message"),
+        }
+    if category == "errors":
+        return {
+            "时间": record.get("timestamp"),
+            "类型": record.get("error_type"),
+            "消息": record.get("error_message"),
+        }
+    return {
+        "时间": record.get("timestamp"),
+        "用户查询": record.get("user_query"),
+        "答案长度": record.get("final_answer_length", 0),
+        "成功": record.get("success", False),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _build_debug_frame(category, session_id, version, _records):
+    """将某类Debug记录转换为DataFrame，按(会话, 记录版本)缓存"""
+    import pandas as pd  # 仅在打开Debug详情时才需要
+    return pd.DataFrame([_debug_row(category, record) for record in _records])
+
+
+def _debug_table(debug_logger, category, empty_message):
+    """以表格显示一类Debug记录，返回选中的记录（无记录时返回None）"""
+    records = debug_logger.session_data.get(category, [])
+    if not records:
+        st.info(empty_message)
+        return None
+    
+    # API请求的响应是事后补写的，已响应数也计入缓存版本
+    version = len(records)
+    if category == "api_requests":
+        version = (version, sum(1 for record in records if record.get("response")))
+    
+    df = _build_debug_frame(category, debug_logger.current_session, version, records)
+    st.dataframe(df, use_container_width=True)
+    
+    index = st.selectbox("查看详情", range(len(records)), format_func=lambda i: f"#{i+1}",
+                         key=f"debug_select_{category}")
+    return records[index]
+
+
+@st.fragment
+def display_debug_details(debug_logger):
+    """渲染详细Debug日志标签页（fragment：标签页内的交互只重跑这一部分）"""
+    if debug_logger.enabled and debug_logger.session_data:
+        # 创建标签页
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["📤 API请求", "🔍 搜索结果", "⚙️ 工作流步骤", "❌ 错误日志", "📊 会话信息"])
+        
+        with tab1:
+            st.markdown("### API请求详情")
+            req = _debug_table(debug_logger, "api_requests", "暂无API请求记录")
+            if req is not None:
+                st.markdown(markdown_table(
+                    ["请求ID", "请求类型", "上下文"],
+                    [(req.get('request_id', 'N/A'), req.get('request_type', 'N/A'), req.get('context') or 'N/A')]
+                ))
+                # 显示完整prompt和响应
+                if st.checkbox("显示完整内容", key="show_full_req"):
+                    st.text_area("完整Prompt:", req.get('full_prompt', ''), height=200)
+                    response = req.get('response', {})
+                    if response and response.get('full_response'):
+                        st.text_area("完整响应:", response.get('full_response', ''), height=200)
+        
+        with tab2:
+            st.markdown("### 搜索结果详情")
+            search = _debug_table(debug_logger, "search_results", "暂无搜索记录")
+            if search is not None:
+                # 默认只显示裁剪后的结果，完整结构按需渲染
+                full_result = search.get('full_result', {})
+                st.json(truncate_json(full_result), expanded=False)
+                if st.checkbox("显示原始JSON", key="show_full_search"):
+                    st.json(full_result)
+        
+        with tab3:
+            st.markdown("### 工作流步骤详情")
+            step = _debug_table(debug_logger, "workflow_steps", "暂无工作流步骤记录")
+            if step is not None:
+                if step.get('step_index') is not None:
+                    st.text(f"步骤索引: {step.get('step_index', 0) + 1}/{step.get('total_steps', 0)}")
+                # 显示输入输出数据
+                if st.checkbox("显示详细数据", key="show_step_data"):
+                    if step.get('full_input'):
+                        st.text("输入数据:")
+                        st.json(step.get('input_summary', {}))
+                    if step.get('full_output'):
+                        st.text("输出数据:")
+                        st.json(step.get('output_summary', {}))
+        
+        with tab4:
+            st.markdown("### 错误日志")
+            error = _debug_table(debug_logger, "errors", "暂无错误记录")
+            if error is not None:
+                if error.get('context'):
+                    st.text("上下文:")
+                    st.json(error.get('context', {}))
+                
+                if error.get('stacktrace'):
+                    st.text("堆栈跟踪:")
+                    st.code(error.get('stacktrace', ''), language='python')
+        
+        with tab5:
+            st.markdown("### 会话信息")
+            session_info = debug_logger.session_data.get("session_info", {})
+            if session_info:
+                st.json(session_info)
+            
+            st.markdown("### 研究结果")
+            result = _debug_table(debug_logger, "research_results", "暂无研究结果记录")
+            if result is not None and result.get('metadata'):
+                st.text("元数据:")
+                st.json(result.get('metadata', {}))
+    else:
+        st.info("Debug模式未启用或暂无数据")
 
 
 def research_interface():
@@ -590,10 +1056,6 @@ def research_interface():
     st.title("🔍 DeepSearch - 智能深度研究助手")
     st.markdown("### 智能深度研究助手")
     
-    # 初始化线程池执行器
-    if "executor" not in st.session_state:
-        st.session_state.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
-
     # 查询输入
     user_query = st.text_area(
         "请输入您的研究问题:",
@@ -657,41 +1119,47 @@ def research_interface():
             if not st.session_state.research_engine:
                 st.error("研究引擎未初始化，请检查API密钥配置")
             else:
-                # 防止重复提交：检查是否已有任务在运行
-                if "current_task_future" in st.session_state and not st.session_state.current_task_future.done():
-                    st.warning("⚠️ 已有研究任务在运行中，请等待完成或先停止当前任务")
+                # 防止重复提交：检查上一个任务是否已在事件循环上真正结束（停止后可能仍在收尾）
+                done_event = st.session_state.get("research_done_event")
+                if done_event is not None and not done_event.is_set():
+                    st.warning("⚠️ 上一个研究任务仍在运行或停止中，请稍候再试")
                     return
                 
                 st.session_state.is_researching = True
                 st.session_state.research_complete = False
                 st.session_state.research_error = None
-                st.session_state.progress_messages = ["🚀 研究任务已启动..."]
+                st.session_state.progress_messages.clear()
+                st.session_state.progress_messages.append("🚀 研究任务已启动...")
+                st.session_state.answer_buffer = ""
                 st.session_state.current_step = "初始化..."
                 st.session_state.progress_percentage = 0
                 # 注意：不要清空research_results，保留历史记录
                 st.session_state.just_completed = False
                 st.session_state.research_started = True  # 添加启动标记
 
-                q = queue.Queue()
-                stop_event = threading.Event()
+                q = queue.SimpleQueue()
                 st.session_state.queue = q
-                st.session_state.stop_event = stop_event
-
-                st.session_state.current_task_future = st.session_state.executor.submit(
-                    run_research_in_background,
-                    st.session_state.research_engine,
-                    user_query,
-                    max_search_rounds,
-                    effort_level,
-                    num_search_queries,
-                    q,
-                    stop_event,
+                done_event = threading.Event()
+                st.session_state.research_done_event = done_event
+
+                # 提交到常驻事件循环，脚本线程立即返回，由进度fragment轮询结果
+                st.session_state.current_task_future = asyncio.run_coroutine_threadsafe(
+                    run_research_in_background(
+                        st.session_state.research_engine,
+                        user_query,
+                        max_search_rounds,
+                        effort_level,
+                        num_search_queries,
+                        q,
+                        done_event,
+                    ),
+                    get_research_loop(),
                 )
                 st.rerun()
     else:
         if st.button("⏹️ 停止研究", type="secondary"):
-            if "stop_event" in st.session_state:
-                st.session_state.stop_event.set()
+            if st.session_state.research_engine:
+                st.session_state.research_engine.stop_research()
             
             # 立即重置研究状态，防止重复提交
             st.session_state.is_researching = False
@@ -699,89 +1167,19 @@ def research_interface():
             st.session_state.current_step = "已停止"
             st.session_state.progress_messages.append("🛑 用户手动停止研究")
             
-            # 等待后台任务完成
+            # 取消后台协程：CancelledError会在当前await处抛出，中断进行中的请求
             if "current_task_future" in st.session_state:
-                try:
-                    # 给后台任务一些时间来响应停止信号
-                    st.session_state.current_task_future.result(timeout=2)
-                except:
-                    pass  # 忽略超时或其他异常
+                st.session_state.current_task_future.cancel()
+            # future取消后立即显示完成，短暂等待循环上的任务收尾，再允许开始新的研究
+            done_event = st.session_state.get("research_done_event")
+            if done_event is not None and not done_event.wait(RESEARCH_STOP_WAIT):
+                st.session_state.progress_messages.append("⏳ 后台任务仍在停止中，稍后即可开始新的研究")
             
             st.rerun()
 
-    # 研究进行中，处理队列更新
+    # 研究进行中，显示定时刷新的进度
     if st.session_state.is_researching:
-        display_real_time_progress()
-
-        if "queue" in st.session_state:
-            try:
-                while not st.session_state.queue.empty():
-                    item = st.session_state.queue.get_nowait()
-                    if item["type"] == "progress":
-                        msg = f"[{item['percentage']:.1f}%] {item['message']}"
-                        st.session_state.progress_messages.append(msg)
-                        st.session_state.progress_percentage = item["percentage"]
-                    elif item["type"] == "step":
-                        st.session_state.current_step = item["message"]
-                        st.session_state.progress_messages.append(f"⚡ {item['message']}")
-                    elif item["type"] == "result":
-                        st.session_state.is_researching = False
-                        st.session_state.research_complete = True
-                        st.session_state.current_task = item["data"]
-                        st.session_state.research_results.append(item["data"])
-                        st.session_state.just_completed = True
-                        
-                        # 保存到LocalStorage
-                        try:
-                            localS = SafeLocalStorage()
-                            serializable_results = json_serializable(st.session_state.research_results)
-                            # 转换为JSON字符串
-                            json_string = json.dumps(serializable_results, ensure_ascii=False)
-                            success = localS.setItem("research_results", json_string)
-                            if success:
-                                # 更新缓存
-                                st.session_state.ls_research_results = json_string
-                            else:
-                                st.warning("⚠️ 保存历史记录到LocalStorage失败")
-                        except Exception as e:
-                            st.warning(f"⚠️ 保存历史记录失败: {e}")
-                            import traceback
-                            st.error(f"详细错误: {traceback.format_exc()}")
-
-                    elif item["type"] == "error":
-                        st.session_state.is_researching = False
-                        st.session_state.research_error = item["message"]
-                    elif item["type"] == "info": # 用于处理用户停止等情况
-                        st.session_state.is_researching = False
-                        st.info(item["message"])
-
-                # 如果仍在研究中，安排下一次刷新
-                if st.session_state.is_researching:
-                    time.sleep(0.1)
-                    st.rerun()
-                elif st.session_state.just_completed: # 研究刚刚结束，刷新一次以显示最终结果
-                    st.rerun()
-            except queue.Empty:
-                # 队列为空，检查后台任务是否仍在运行
-                if st.session_state.is_researching:
-                    future = st.session_state.get("current_task_future")
-                    if future and future.done():
-                        # 任务已结束，但队列中没有消息，说明可能发生意外
-                        try:
-                            # 尝试获取结果，这会重新引发在线程中发生的任何异常
-                            future.result() 
-                            # 如果没有异常，但走到了这里，说明逻辑有问题
-                            st.session_state.research_error = "研究意外终止，但未报告明确错误。"
-                        except Exception as e:
-                            # 捕获到后台任务的异常
-                            st.session_state.research_error = f"研究任务在后台发生错误: {e}"
-                        
-                        st.session_state.is_researching = False
-                        st.rerun()
-                    else:
-                        # 任务仍在运行，队列为空是正常的，继续轮询
-                        time.sleep(0.1)
-                        st.rerun()
+        research_progress_fragment()
 
     # 显示历史研究结果
     if st.session_state.research_results:
@@ -792,26 +1190,33 @@ def research_interface():
         
         st.markdown("---")
         st.subheader("📜 研究历史记录")
-        for i, result in enumerate(reversed(st.session_state.research_results)):
+        # 历史较多时只渲染最近的若干条，其余通过"加载更多"分页显示
+        total_history = len(st.session_state.research_results)
+        visible_count = min(st.session_state.get("history_visible_count", HISTORY_PAGE_SIZE), total_history)
+        visible_results = st.session_state.research_results[total_history - visible_count:]
+        
+        for i, result in enumerate(reversed(visible_results)):
             task_id = result.get("task_id", f"history_{i}")
-            # 从task_id中提取时间戳，如果失败则使用当前时间
-            try:
-                if task_id.startswith("task_") and len(task_id) >= 20:
-                    timestamp_str = task_id[5:20]  # 提取 YYYYMMDD_HHMMSS 部分
-                    timestamp = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-                    time_display = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    time_display = "未知时间"
-            except:
-                time_display = "未知时间"
+            opened_key = f"opened_{task_id}"
             
-            with st.expander(f"**{result.get('user_query', '未知查询')}** - {time_display} ({task_id[:20]})", expanded=(i==0)):
-                if result.get("success"):
+            with st.expander(history_label(result, task_id), expanded=(i==0)):
+                if not result.get("success"):
+                    st.error(f"研究失败: {result.get('error', '未知错误')}")
+                elif i == 0 or st.session_state.get(opened_key):
                     display_final_answer(result, index=i)
                     display_search_results(result)
-                    display_task_analysis(result.get("workflow_analysis"), result.get("task_id"))
+                    workflow_analysis = result.get("workflow_analysis")
+                    if workflow_analysis:
+                        display_task_analysis(workflow_analysis, task_id)
                 else:
-                    st.error(f"研究失败: {result.get('error', '未知错误')}")
+                    # 折叠的expander内容每次重跑仍会执行，未打开过的条目只渲染一个按钮
+                    st.button("📖 展开详情", key=f"open_{task_id}_{i}",
+                              on_click=st.session_state.__setitem__, args=(opened_key, True))
+        
+        if visible_count < total_history:
+            if st.button(f"⬇️ 加载更多（剩余 {total_history - visible_count} 条）", key="load_more_history"):
+                st.session_state.history_visible_count = visible_count + HISTORY_PAGE_SIZE
+                st.rerun()
 
     # 如果有错误，显示错误信息
     if st.session_state.research_error and not st.session_state.is_researching:
@@ -825,142 +1230,7 @@ def research_interface():
         from utils.debug_logger import get_debug_logger
         debug_logger = get_debug_logger()
         
-        if debug_logger.enabled and debug_logger.session_data:
-            # 创建标签页
-            tab1, tab2, tab3, tab4, tab5 = st.tabs(["📤 API请求", "🔍 搜索结果", "⚙️ 工作流步骤", "❌ 错误日志", "📊 会话信息"])
-            
-            with tab1:
-                st.markdown("### API请求详情")
-                api_requests = debug_logger.session_data.get("api_requests", [])
-                if api_requests:
-                    for i, req in enumerate(api_requests):
-                        with st.expander(f"请求 {i+1}: {req.get('request_type', 'unknown')} - {req.get('context', '')}", expanded=False):
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.text(f"时间: {req.get('timestamp', 'N/A')}")
-                                st.text(f"请求ID: {req.get('request_id', 'N/A')}")
-                                st.text(f"模型: {req.get('model', 'N/A')}")
-                                st.text(f"类型: {req.get('request_type', 'N/A')}")
-                                st.text(f"上下文: {req.get('context', 'N/A')}")
-                            with col2:
-                                st.text(f"Prompt长度: {req.get('full_prompt_length', 0)}")
-                                response = req.get('response', {})
-                                if response:
-                                    st.text(f"响应长度: {response.get('full_response_length', 0)}")
-                                    st.text(f"耗时: {response.get('duration', 0):.2f}s")
-                                    st.text(f"状态: {response.get('status', 'N/A')}")
-                            
-                            # 显示完整prompt和响应
-                            if st.checkbox(f"显示完整内容 - 请求{i+1}", key=f"show_full_req_{i}"):
-                                st.text_area("完整Prompt:", req.get('full_prompt', ''), height=200, key=f"prompt_{i}")
-                                if response and response.get('full_response'):
-                                    st.text_area("完整响应:", response.get('full_response', ''), height=200, key=f"response_{i}")
-                else:
-                    st.info("暂无API请求记录")
-            
-            with tab2:
-                st.markdown("### 搜索结果详情")
-                search_results = debug_logger.session_data.get("search_results", [])
-                if search_results:
-                    for i, search in enumerate(search_results):
-                        with st.expander(f"搜索 {i+1}: {search.get('query', 'unknown')[:50]}...", expanded=False):
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.text(f"时间: {search.get('timestamp', 'N/A')}")
-                                st.text(f"查询: {search.get('query', 'N/A')}")
-                                st.text(f"类型: {search.get('search_type', 'N/A')}")
-                                st.text(f"成功: {search.get('success', False)}")
-                            with col2:
-                                st.text(f"内容长度: {search.get('content_length', 0)}")
-                                st.text(f"引用数: {search.get('citations_count', 0)}")
-                                st.text(f"URL数: {search.get('urls_count', 0)}")
-                                st.text(f"耗时: {search.get('duration', 0):.2f}s")
-                            
-                            # 显示完整搜索结果
-                            if st.checkbox(f"显示完整结果 - 搜索{i+1}", key=f"show_full_search_{i}"):
-                                full_result = search.get('full_result', {})
-                                st.json(full_result)
-                else:
-                    st.info("暂无搜索记录")
-            
-            with tab3:
-                st.markdown("### 工作流步骤详情")
-                workflow_steps = debug_logger.session_data.get("workflow_steps", [])
-                if workflow_steps:
-                    for i, step in enumerate(workflow_steps):
-                        step_name = step.get('step_name', 'unknown')
-                        step_status = step.get('step_status', 'unknown')
-                        duration = step.get('duration', 0)
-                        
-                        status_icon = {"completed": "✅", "running": "🔄", "failed": "❌", "info": "ℹ️", "decision": "🤔"}.get(step_status, "❓")
-                        
-                        with st.expander(f"步骤 {i+1}: {status_icon} {step_name} [{duration:.2f}s]", expanded=False):
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.text(f"时间: {step.get('timestamp', 'N/A')}")
-                                st.text(f"步骤名: {step_name}")
-                                st.text(f"状态: {step_status}")
-                                if step.get('step_index') is not None:
-                                    st.text(f"步骤索引: {step.get('step_index', 0) + 1}/{step.get('total_steps', 0)}")
-                            with col2:
-                                st.text(f"耗时: {duration:.2f}s")
-                                if step.get('error_message'):
-                                    st.text(f"错误: {step.get('error_message', '')}")
-                            
-                            # 显示输入输出数据
-                            if st.checkbox(f"显示详细数据 - 步骤{i+1}", key=f"show_step_data_{i}"):
-                                if step.get('full_input'):
-                                    st.text("输入数据:")
-                                    st.json(step.get('input_summary', {}))
-                                if step.get('full_output'):
-                                    st.text("输出数据:")
-                                    st.json(step.get('output_summary', {}))
-                else:
-                    st.info("暂无工作流步骤记录")
-            
-            with tab4:
-                st.markdown("### 错误日志")
-                errors = debug_logger.session_data.get("errors", [])
-                if errors:
-                    for i, error in enumerate(errors):
-                        with st.expander(f"错误 {i+1}: {error.get('error_type', 'unknown')}", expanded=False):
-                            st.text(f"时间: {error.get('timestamp', 'N/A')}")
-                            st.text(f"类型: {error.get('error_type', 'N/A')}")
-                            st.text(f"消息: {error.get('error_message', 'N/A')}")
-                            
-                            if error.get('context'):
-                                st.text("上下文:")
-                                st.json(error.get('context', {}))
-                            
-                            if error.get('stacktrace'):
-                                st.text("堆栈跟踪:")
-                                st.code(error.get('stacktrace', ''), language='python')
-                else:
-                    st.info("暂无错误记录")
-            
-            with tab5:
-                st.markdown("### 会话信息")
-                session_info = debug_logger.session_data.get("session_info", {})
-                if session_info:
-                    st.json(session_info)
-                
-                st.markdown("### 研究结果")
-                research_results = debug_logger.session_data.get("research_results", [])
-                if research_results:
-                    for i, result in enumerate(research_results):
-                        with st.expander(f"研究结果 {i+1}: {result.get('user_query', 'unknown')[:50]}...", expanded=False):
-                            st.text(f"时间: {result.get('timestamp', 'N/A')}")
-                            st.text(f"用户查询: {result.get('user_query', 'N/A')}")
-                            st.text(f"答案长度: {result.get('final_answer_length', 0)}")
-                            st.text(f"成功: {result.get('success', False)}")
-                            
-                            if result.get('metadata'):
-                                st.text("元数据:")
-                                st.json(result.get('metadata', {}))
-                else:
-                    st.info("暂无研究结果记录")
-        else:
-            st.info("Debug模式未启用或暂无数据")
+        display_debug_details(debug_logger)
         
         # 关闭按钮
         if st.button("❌ 关闭详细日志"):
@@ -980,10 +1250,9 @@ def export_results():
     latest_result = st.session_state.research_results[-1]
     
     try:
-        # 使用 json_serializable 处理枚举等特殊类型
-        json_data = json.dumps(json_serializable(latest_result), indent=4, ensure_ascii=False)
-        
         task_id = latest_result.get("task_id", "research_results")
+        # 结果完成后不再变化，按task_id缓存序列化结果，避免每次重跑重复生成
+        json_data = get_export_json(task_id, latest_result)
         file_name = f"{task_id}.json"
 
         st.sidebar.download_button(
@@ -994,7 +1263,18 @@ def export_results():
             help="将最近一次的研究结果导出为JSON文件"
         )
 
-        markdown_content = create_markdown_content(latest_result)
+        # 安装了zstandard时额外提供压缩版本，长报告体积可缩小数倍
+        zst_data = get_export_json_zst(task_id, latest_result)
+        if zst_data is not None:
+            st.sidebar.download_button(
+                label="🗜️ 下载压缩JSON (.zst)",
+                data=zst_data,
+                file_name=f"{task_id}.json.zst",
+                mime="application/zstd",
+                help="zstd压缩的JSON结果，适合较大的研究报告"
+            )
+
+        markdown_content = get_export_markdown(task_id, latest_result)
         md_file_name = f"{task_id}.md"
 
         st.sidebar.download_button(
@@ -1035,7 +1315,15 @@ def sidebar_content():
     # 会话统计
     st.sidebar.markdown("### 📊 会话统计")
     if st.session_state.research_engine:
-        stats = st.session_state.research_engine.state_manager.get_session_statistics()
+        state_manager = st.session_state.research_engine.state_manager
+        counters = state_manager.statistics
+        # 计数未变化时复用上次的统计结果；清空会话会替换statistics字典，id随之变化
+        stats_key = (id(counters), counters.get("total_tasks"),
+                     counters.get("successful_tasks"), counters.get("total_searches"))
+        if st.session_state.get("_stats_key") != stats_key:
+            st.session_state._stats_cache = state_manager.get_session_statistics()
+            st.session_state._stats_key = stats_key
+        stats = st.session_state._stats_cache
         
         col1, col2 = st.sidebar.columns(2)
         with col1:
@@ -1043,7 +1331,8 @@ def sidebar_content():
             st.metric("总搜索数", stats.get("total_searches", 0))
         with col2:
             st.metric("成功任务", stats.get("successful_tasks", 0))
-            session_duration = stats.get("session_duration", 0)
+            # 会话时长需要实时计算，不走缓存
+            session_duration = (datetime.now() - counters["session_start_time"]).total_seconds()
             st.metric("会话时长", f"{session_duration/60:.1f}分钟")
 
     # 导出结果
@@ -1059,28 +1348,18 @@ def sidebar_content():
             st.session_state.research_engine.clear_session()
         
         # 清除LocalStorage中的研究结果，但保留API key
-        localS = SafeLocalStorage()
-        localS.removeItem("research_results")
-
-        # 重置所有状态
-        keys_to_reset = [
-            "research_results", "current_task", "progress_messages",
-            "is_researching", "research_complete", "research_error",
-            "current_step", "progress_percentage", "research_started",
-            "just_completed", "show_markdown_preview", "history_loaded",
-            "first_load_message_shown", "ls_research_results", "ls_api_key"
-        ]
-        for key in keys_to_reset:
-            if key in st.session_state:
-                if isinstance(st.session_state[key], list):
-                    st.session_state[key] = []
-                elif isinstance(st.session_state[key], bool):
-                    st.session_state[key] = False
-                else:
-                    st.session_state[key] = None
-        
-        if "current_research_id" in st.session_state:
-            del st.session_state.current_research_id
+        localS = get_local_storage()
+        localS.clear_research_results()
+        forget_history_entries(st.session_state.research_results)
+
+        # 重置所有状态（列表复制一份，避免与默认值共享同一对象）
+        st.session_state.update({
+            key: value.copy() if isinstance(value, list) else value
+            for key, value in _RESET_DEFAULTS.items()
+        })
+        for key in _RESET_REMOVE_KEYS:
+            st.session_state.pop(key, None)
+        st.session_state.progress_messages.clear()
         
         st.sidebar.success("会话已清空")
         st.rerun()
@@ -1097,43 +1376,36 @@ def main():
     
     if not st.session_state.history_loaded:
         try:
-            localS = SafeLocalStorage()
+            localS = get_local_storage()
             
-            # 使用session state缓存LocalStorage的值，避免重复调用
-            if "ls_research_results" not in st.session_state:
-                initial_results = localS.getItem("research_results")
-                st.session_state.ls_research_results = initial_results
-                # 调试信息
-                if st.session_state.get("debug_enabled", False):
-                    st.info(f"🔍 从LocalStorage加载: {type(initial_results)} = {str(initial_results)[:100]}...")
-            else:
-                initial_results = st.session_state.ls_research_results
+            # 直接读取引导阶段填充的session state槽位
+            initial_results = localS.get_research_results()
+            # 调试信息
+            if st.session_state.get("debug_enabled", False):
+                st.info(f"🔍 从LocalStorage加载: {type(initial_results)} = {str(initial_results)[:100]}...")
             
             # 只有当LocalStorage返回有效数据且当前没有历史记录时才加载
-            if (initial_results and 
-                initial_results != "null" and 
-                initial_results != None and 
-                str(initial_results).strip() != "" and
-                len(st.session_state.research_results) == 0):
+            if _is_usable(initial_results) and not st.session_state.research_results:
                 
                 try:
                     if isinstance(initial_results, str):
-                        parsed_results = json.loads(initial_results)
+                        parsed_results = _json_loads(initial_results)
                     else:
                         parsed_results = initial_results
                     
                     if isinstance(parsed_results, list) and len(parsed_results) > 0:
                         st.session_state.research_results = parsed_results
+                        index_history_labels(parsed_results)
+                        # 只保留解析后的列表，释放原始JSON字符串
+                        st.session_state.pop("ls_research_results", None)
+                        st.session_state.pop("ls_research_results_z", None)
                         # 只在第一次加载时显示消息，避免每次刷新都显示
                         if "first_load_message_shown" not in st.session_state:
                             st.success(f"✅ 已加载 {len(parsed_results)} 条历史记录")
                             st.session_state.first_load_message_shown = True
                 except (json.JSONDecodeError, TypeError) as e:
                     st.warning(f"⚠️ 历史记录格式错误，已清空: {e}")
-                    localS.removeItem("research_results")
-                    # 清除缓存
-                    if "ls_research_results" in st.session_state:
-                        del st.session_state.ls_research_results
+                    localS.clear_research_results()
             
             st.session_state.history_loaded = True
         except Exception as e:
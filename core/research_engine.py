@@ -14,7 +14,7 @@ from .search_agent import SearchAgent
 from .state_manager import StateManager, TaskStatus
 from .model_config import ModelConfiguration, get_model_config, set_user_model
 from utils.prompts import PromptTemplates
-from utils.helpers import extract_json_from_text
+from utils.helpers import extract_json_from_text, logger
 from utils.debug_logger import get_debug_logger
 
 
@@ -28,11 +28,11 @@ class ResearchEngine:
         set_user_model(model_name)
         self.model_config = get_model_config()
         
-        print(f"🤖 模型配置:")
-        print(f"  搜索模型: {self.model_config.search_model} (固定)")
-        print(f"  任务分析模型: {self.model_config.task_analysis_model}")
-        print(f"  反思模型: {self.model_config.reflection_model}")
-        print(f"  答案生成模型: {self.model_config.answer_model}")
+        logger.info(f"🤖 模型配置:")
+        logger.info(f"  搜索模型: {self.model_config.search_model} (固定)")
+        logger.info(f"  任务分析模型: {self.model_config.task_analysis_model}")
+        logger.info(f"  反思模型: {self.model_config.reflection_model}")
+        logger.info(f"  答案生成模型: {self.model_config.answer_model}")
         
         # 初始化核心组件，使用对应的模型
         self.workflow_builder = DynamicWorkflowBuilder(api_key, self.model_config.task_analysis_model)
@@ -44,11 +44,13 @@ class ResearchEngine:
         self.progress_callback: Optional[Callable] = None
         self.step_callback: Optional[Callable] = None
         self.error_callback: Optional[Callable] = None
+        self.answer_callback: Optional[Callable] = None
         
         # 停止控制标记
         self._stop_research = False
     
-    def set_callbacks(self, progress_callback=None, step_callback=None, error_callback=None):
+    def set_callbacks(self, progress_callback=None, step_callback=None, error_callback=None,
+                      answer_callback=None):
         """设置回调函数"""
         if progress_callback:
             self.progress_callback = progress_callback
@@ -56,6 +58,8 @@ class ResearchEngine:
             self.step_callback = step_callback
         if error_callback:
             self.error_callback = error_callback
+        if answer_callback:
+            self.answer_callback = answer_callback
     
     def set_progress_callback(self, callback: Callable):
         """设置进度回调函数"""
@@ -69,6 +73,10 @@ class ResearchEngine:
         """设置错误回调函数"""
         self.error_callback = callback
     
+    def set_answer_callback(self, callback: Callable):
+        """设置答案流式输出回调函数（每收到一段文本调用一次）"""
+        self.answer_callback = callback
+    
     def stop_research(self):
         """停止当前研究"""
         self._stop_research = True
@@ -226,8 +234,8 @@ class ResearchEngine:
             complexity = workflow.config.get("complexity", "Medium")
             estimated_steps = len(workflow.steps_config)  # 使用步骤配置数量
             
-            print(f"🔍 工作流详情: 类型={task_type}, 复杂度={complexity}, 实际步骤={estimated_steps}")
-            print(f"🔍 步骤列表: {[step['name'] for step in workflow.steps_config]}")
+            logger.info(f"🔍 工作流详情: 类型={task_type}, 复杂度={complexity}, 实际步骤={estimated_steps}")
+            logger.info(f"🔍 步骤列表: {[step['name'] for step in workflow.steps_config]}")
             
             self._notify_step(f"任务类型: {task_type} (复杂度: {complexity})")
             self._notify_progress(f"工作流构建完成，预计{estimated_steps}步", 30)
@@ -237,7 +245,7 @@ class ResearchEngine:
         except Exception as e:
             error_msg = f"工作流构建失败: {str(e)}"
             self._notify_step(error_msg)
-            print(f"❌ 工作流构建异常: {e}")
+            logger.error(f"❌ 工作流构建异常: {e}")
             
             # 创建一个简单的降级工作流
             return self._create_fallback_workflow()
@@ -304,7 +312,7 @@ class ResearchEngine:
                 search_timeout=45
             )
         
-        print(f"🎯 用户effort级别: {effort_level} → 复杂度: {workflow.config['complexity']}, 最大搜索轮数: {workflow.config['max_search_rounds']}")
+        logger.info(f"🎯 用户effort级别: {effort_level} → 复杂度: {workflow.config['complexity']}, 最大搜索轮数: {workflow.config['max_search_rounds']}")
     
     def _inject_research_functions(self, workflow: DynamicWorkflow):
         """将实际的研究函数注入到工作流步骤中"""
@@ -349,7 +357,7 @@ class ResearchEngine:
             "effort_level": workflow.config.get("complexity", "Medium").lower()
         }
         
-        print(f"🔄 执行工作流，最大搜索轮数: {effective_max_rounds}")
+        logger.info(f"🔄 执行工作流，最大搜索轮数: {effective_max_rounds}")
         
         # 执行初始步骤，直到需要循环的"补充搜索"或"最终答案"
         for step in workflow.steps:
@@ -561,49 +569,35 @@ class ResearchEngine:
         return {"search_queries": queries}
     
     async def _execute_search_step(self, **kwargs) -> Dict[str, Any]:
-        """执行搜索步骤"""
+        """执行搜索步骤（各查询并发执行，按完成顺序更新进度）"""
         search_queries = kwargs.get("search_queries", [kwargs.get("user_query", "")])
+        total = len(search_queries)
         
         self._notify_step("正在执行网络搜索...")
+        self._notify_progress(f"并发执行 {total} 个搜索查询...", 40)
         
+        tasks = [asyncio.ensure_future(self._run_single_search(i, query, total))
+                 for i, query in enumerate(search_queries)]
+        completed = {}
+        try:
+            for finished in asyncio.as_completed(tasks):
+                i, query, result = await finished
+                completed[i] = (query, result)
+                self._notify_progress(f"搜索查询完成 {len(completed)}/{total}: {query[:30]}...",
+                                     40 + (len(completed) * 20 // total))
+        finally:
+            # 研究被停止、超时或某个搜索出错时，取消其余仍在进行的搜索，避免继续产生API调用
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                # 等待被取消的搜索收尾，返回后不再有搜索写入调试日志或状态
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        # 按原查询顺序写入状态，保证分析过程与引用顺序稳定
         search_results = []
-        for i, query in enumerate(search_queries):
-            self._notify_progress(f"搜索查询 {i+1}/{len(search_queries)}: {query[:30]}...", 
-                                 40 + (i * 20 // len(search_queries)))
-            
-            # Debug: 记录搜索请求
-            search_request_id = f"search_{i}_{int(time.time() * 1000)}"
-            self.debug_logger.log_api_request(
-                request_type="grounding_search",
-                model=self.model_config.search_model,
-                prompt=f"搜索查询: {query}",
-                request_id=search_request_id,
-                context=f"搜索查询 {i+1}/{len(search_queries)}"
-            )
-            
-            result = await self.search_agent.search_with_grounding(query)
-            
-            # Debug: 记录搜索结果
-            self.debug_logger.log_search_result(query, result, "grounding")
-            
-            # Debug: 记录搜索响应
-            if result.get("success"):
-                response_summary = f"成功获取内容，长度: {len(result.get('content', ''))}, 引用数: {len(result.get('citations', []))}"
-            else:
-                response_summary = f"搜索失败: {result.get('error', '未知错误')}"
-            
-            self.debug_logger.log_api_response(
-                request_id=search_request_id,
-                response_text=response_summary,
-                metadata={
-                    "success": result.get("success", False),
-                    "content_length": len(result.get("content", "")),
-                    "citations_count": len(result.get("citations", [])),
-                    "urls_count": len(result.get("urls", []))
-                },
-                error=None if result.get("success") else result.get("error", "搜索失败")
-            )
-            
+        for i in range(total):
+            query, result = completed[i]
             if result.get("success"):
                 # 将结果添加到状态管理器（会转换为 SearchResult 对象）
                 self.state_manager.add_search_result(query, result)
@@ -622,6 +616,43 @@ class ResearchEngine:
         
         return {"search_results": search_results}
     
+    async def _run_single_search(self, i: int, query: str, total: int):
+        """执行单个搜索查询并记录Debug信息"""
+        # Debug: 记录搜索请求
+        search_request_id = f"search_{i}_{int(time.time() * 1000)}"
+        self.debug_logger.log_api_request(
+            request_type="grounding_search",
+            model=self.model_config.search_model,
+            prompt=f"搜索查询: {query}",
+            request_id=search_request_id,
+            context=f"搜索查询 {i+1}/{total}"
+        )
+        
+        result = await self.search_agent.search_with_grounding(query)
+        
+        # Debug: 记录搜索结果
+        self.debug_logger.log_search_result(query, result, "grounding")
+        
+        # Debug: 记录搜索响应
+        if result.get("success"):
+            response_summary = f"成功获取内容，长度: {len(result.get('content', ''))}, 引用数: {len(result.get('citations', []))}"
+        else:
+            response_summary = f"搜索失败: {result.get('error', '未知错误')}"
+        
+        self.debug_logger.log_api_response(
+            request_id=search_request_id,
+            response_text=response_summary,
+            metadata={
+                "success": result.get("success", False),
+                "content_length": len(result.get("content", "")),
+                "citations_count": len(result.get("citations", [])),
+                "urls_count": len(result.get("urls", []))
+            },
+            error=None if result.get("success") else result.get("error", "搜索失败")
+        )
+        
+        return i, query, result
+    
     async def _analyze_search_results_step(self, **kwargs) -> Dict[str, Any]:
         """分析搜索结果步骤 - 参考原始backend的reflection逻辑"""
         user_query = kwargs.get("user_query", "")
@@ -675,7 +706,7 @@ class ResearchEngine:
                     context=f"第{current_round}轮反思分析"
                 )
                 
-                response = self.search_agent.client.models.generate_content(
+                response = await self.search_agent.client.aio.models.generate_content(
                     model=reflection_model,
                     contents=reflection_prompt,
                     config={
@@ -855,7 +886,7 @@ class ResearchEngine:
 """
                 
                 if self.search_agent.client:
-                    response = self.search_agent.client.models.generate_content(
+                    response = await self.search_agent.client.aio.models.generate_content(
                         model=self.model_config.get_model_for_task("search"),
                         contents=context_prompt,
                         config={"temperature": 0.7, "max_output_tokens": 500}
@@ -957,7 +988,7 @@ class ResearchEngine:
                     self._notify_step(f"❌ 补充搜索失败: {str(e)}")
             
             # 添加延迟避免速率限制
-            time.sleep(1)
+            await asyncio.sleep(1)
         
         self._notify_step(f"🎯 第 {current_round} 轮补充搜索完成，共获得 {len(additional_results)} 个结果")
         
@@ -1024,20 +1055,34 @@ class ResearchEngine:
                     context="生成最终答案"
                 )
                 
-                response = self.search_agent.client.models.generate_content(
-                    model=answer_model,
-                    contents=synthesis_prompt,
-                    config={
-                        "temperature": 0.3,
-                        "max_output_tokens": max_tokens
-                    }
-                )
+                answer_config = {
+                    "temperature": 0.3,
+                    "max_output_tokens": max_tokens
+                }
+                if self.answer_callback:
+                    # 流式生成，边生成边把片段推送给界面
+                    answer_parts = []
+                    stream = await self.search_agent.client.aio.models.generate_content_stream(
+                        model=answer_model,
+                        contents=synthesis_prompt,
+                        config=answer_config
+                    )
+                    async for chunk in stream:
+                        if chunk.text:
+                            answer_parts.append(chunk.text)
+                            self._notify_answer(chunk.text)
+                    final_answer = "".join(answer_parts)
+                else:
+                    response = await self.search_agent.client.aio.models.generate_content(
+                        model=answer_model,
+                        contents=synthesis_prompt,
+                        config=answer_config
+                    )
+                    final_answer = response.text
                 
                 self._notify_step("AI模型响应完成，正在处理结果...")
                 self._notify_progress("答案生成完成", 95)
                 
-                final_answer = response.text
-                
                 # Debug: 记录最终答案生成API响应
                 self.debug_logger.log_api_response(
                     request_id=answer_request_id,
@@ -1109,7 +1154,7 @@ Note: This information is gathered from web searches. Please verify for accuracy
                     answer_model = self.model_config.get_model_for_task("answer")
                     max_tokens = self.model_config.get_token_limits("answer")
                     
-                    response = self.search_agent.client.models.generate_content(
+                    response = await self.search_agent.client.aio.models.generate_content(
                         model=answer_model,
                         contents=synthesis_prompt,
                         config={
@@ -1149,6 +1194,11 @@ Note: This information is gathered from web searches. Please verify for accuracy
         if self.step_callback:
             self.step_callback(message)
     
+    def _notify_answer(self, text: str):
+        """通知新生成的答案片段"""
+        if self.answer_callback:
+            self.answer_callback(text)
+    
     def get_current_task_info(self) -> Dict[str, Any]:
         """获取当前任务信息"""
         return self.state_manager.get_task_summary()
@@ -4,7 +4,10 @@
 """
 
 import time
+import asyncio
+import itertools
 import traceback
+from functools import lru_cache
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
@@ -24,6 +27,12 @@ from utils.helpers import (
 from utils.debug_logger import get_debug_logger
 
 
+@lru_cache(maxsize=8)
+def get_shared_client(api_key: str):
+    """按API密钥复用 genai 客户端，让各组件共享同一个连接池"""
+    return Client(api_key=api_key)
+
+
 class SearchAgent:
     """智能搜索代理"""
     
@@ -33,15 +42,32 @@ class SearchAgent:
         self.client = None
         self.search_history = []
         self.debug_logger = get_debug_logger()
+        # 速率限制：相邻两次请求的最小发起间隔（秒）
+        self.min_request_interval = 2.0
+        self._next_request_time = 0.0
+        self._rate_lock = None
+        # 并发搜索可能在同一毫秒发起，用递增序号保证Debug请求ID唯一
+        self._request_seq = itertools.count(1)
         
         # 初始化客户端
         if Client:
-            self.client = Client(api_key=api_key)
+            self.client = get_shared_client(api_key)
     
     def _is_available(self) -> bool:
         """检查搜索代理是否可用"""
         return Client is not None and self.client is not None
     
+    async def _wait_for_rate_limit(self):
+        """为本次请求预约发起时间并异步等待，并发请求按最小间隔错开"""
+        if self._rate_lock is None:
+            self._rate_lock = asyncio.Lock()
+        async with self._rate_lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_request_time)
+            self._next_request_time = start_at + self.min_request_interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+    
     async def search_with_grounding(self, query: str, use_search: bool = True) -> Dict[str, Any]:
         """
         使用 Gemini 2.0 的内置搜索功能进行搜索
@@ -58,7 +84,7 @@ class SearchAgent:
         
         try:
             search_start_time = datetime.now()
-            request_id = f"search_{int(time.time() * 1000)}"
+            request_id = f"search_{int(time.time() * 1000)}_{next(self._request_seq)}"
             
             # Debug: 记录API请求
             config_dict = {
@@ -74,13 +100,8 @@ class SearchAgent:
                 request_id=request_id
             )
             
-            # 添加延迟避免速率限制
-            if hasattr(self, '_last_request_time'):
-                time_since_last = time.time() - self._last_request_time
-                if time_since_last < 2.0:
-                    time.sleep(2.0 - time_since_last)
-            
-            self._last_request_time = time.time()
+            # 添加延迟避免速率限制（异步等待，不阻塞其他并发搜索）
+            await self._wait_for_rate_limit()
             
             # 配置工具和参数
             config = GenerateContentConfig(
@@ -92,8 +113,8 @@ class SearchAgent:
                 google_search_tool = Tool(google_search=GoogleSearch())
                 config.tools = [google_search_tool]
             
-            # 使用 google.genai.Client 进行搜索
-            response = self.client.models.generate_content(
+            # 使用 google.genai.Client 的异步接口进行搜索
+            response = await self.client.aio.models.generate_content(
                 model=self.model_name,
                 contents=query,
                 config=config
@@ -224,6 +245,8 @@ class SearchAgent:
     def _extract_citations(self, grounding_supports, grounding_chunks) -> List[Dict]:
         """提取引用信息"""
         citations = []
+        # 同一个chunk会被多个support引用，标题和域名只解析一次
+        chunk_sources = {}
         
         for support in grounding_supports:
             if hasattr(support, 'segment') and hasattr(support, 'grounding_chunk_indices'):
@@ -233,46 +256,47 @@ class SearchAgent:
                 if end_index is None:
                     continue  # 跳过没有end_index的项
                 
-                # 获取对应的grounding chunks  
-                chunk_citations = []
+                # 为了兼容性，我们为每个chunk创建单独的citation
                 for chunk_idx in support.grounding_chunk_indices:
-                    if chunk_idx < len(grounding_chunks):
-                        chunk = grounding_chunks[chunk_idx]
-                        if hasattr(chunk, 'web') and chunk.web:
-                            title = getattr(chunk.web, 'title', '') or 'Unknown Source'
-                            uri = getattr(chunk.web, 'uri', '#')
-                            
-                            # 清理标题（移除文件扩展名等）
-                            if title and isinstance(title, str) and '.' in title:
-                                title = title.split('.')[0]
-                            
-                            # 提取域名
-                            domain = 'Unknown Domain'
-                            if uri and '//' in uri:
-                                try:
-                                    domain = uri.split('//')[1].split('/')[0]
-                                except:
-                                    domain = 'Unknown Domain'
-                            
-                            chunk_citations.append({
-                                "title": title,
-                                "url": uri,
-                                "description": f"来源: {domain}"
-                            })
-                
-                if chunk_citations:
-                    # 为了兼容性，我们为每个chunk创建单独的citation
-                    for chunk_citation in chunk_citations:
+                    if chunk_idx not in chunk_sources:
+                        chunk_sources[chunk_idx] = self._chunk_source(grounding_chunks, chunk_idx)
+                    source = chunk_sources[chunk_idx]
+                    if source:
                         citations.append({
-                            "title": chunk_citation["title"],
-                            "url": chunk_citation["url"], 
-                            "description": chunk_citation["description"],
+                            **source,
                             "start_index": start_index,
                             "end_index": end_index
                         })
         
         return citations
     
+    @staticmethod
+    def _chunk_source(grounding_chunks, chunk_idx) -> Optional[Dict]:
+        """解析单个grounding chunk的标题、URL和来源域名"""
+        if chunk_idx >= len(grounding_chunks):
+            return None
+        chunk = grounding_chunks[chunk_idx]
+        if not (hasattr(chunk, 'web') and chunk.web):
+            return None
+        
+        title = getattr(chunk.web, 'title', '') or 'Unknown Source'
+        uri = getattr(chunk.web, 'uri', '#')
+        
+        # 清理标题（移除文件扩展名等）
+        if isinstance(title, str):
+            title = title.split('.', 1)[0]
+        
+        # 提取域名
+        domain = 'Unknown Domain'
+        if uri and '//' in uri:
+            domain = uri.split('//', 1)[1].split('/', 1)[0] or domain
+        
+        return {
+            "title": title,
+            "url": uri,
+            "description": f"来源: {domain}"
+        }
+    
     async def generate_search_queries(self, user_query: str, num_queries: int = 3) -> List[str]:
         """生成搜索查询"""
         if not self._is_available():
@@ -288,7 +312,7 @@ class SearchAgent:
             {{"queries": ["查询1", "查询2", "查询3"]}}
             """
             
-            response = self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model=self.model_name,
                 contents=prompt,
                 config=GenerateContentConfig(
@@ -316,7 +340,7 @@ class SearchAgent:
             results.append(result)
             
             # 添加延迟避免速率限制
-            time.sleep(1)
+            await asyncio.sleep(1)
         
         return results
     
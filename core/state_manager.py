@@ -4,7 +4,7 @@
 """
 
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -87,6 +87,9 @@ class StateManager:
         self.web_research_results: List[str] = []
         self.reflection_results: List[Dict[str, Any]] = []
         
+        # 搜索结果汇总缓存：(搜索结果版本, 引用元组, URL元组, 成功数)
+        self._search_summary_cache = None
+        
         # 会话历史
         self.conversation_history: List[Dict[str, Any]] = []
         self.task_history: List[TaskProgress] = []
@@ -204,6 +207,7 @@ class StateManager:
         self.search_results.clear()
         self.search_history.clear()
         self.current_search_round = 0
+        self._search_summary_cache = None
         self.step_results.clear()
         self.execution_context.clear()
         self.workflow_analysis = None
@@ -289,6 +293,41 @@ class StateManager:
                 all_urls.extend(result.urls)
         return list(set(all_urls))
     
+    def _search_results_version(self):
+        """搜索结果的版本标识（列表对象+长度），用于判断缓存是否失效"""
+        return (id(self.search_results), len(self.search_results))
+    
+    def _search_summary(self):
+        """一次遍历成功的搜索结果，汇总引用、去重URL和成功数，结果不变时直接复用"""
+        version = self._search_results_version()
+        cached = self._search_summary_cache
+        if cached is None or cached[0] != version:
+            citations = []
+            urls = set()
+            successful = 0
+            for result in self.search_results:
+                if result.success:
+                    successful += 1
+                    citations.extend(
+                        (citation.get("title", "未知标题"), citation.get("url", "#"))
+                        for citation in result.citations
+                    )
+                    urls.update(result.urls)
+            cached = self._search_summary_cache = (version, tuple(citations), tuple(urls), successful)
+        return cached
+    
+    def snapshot(self) -> Tuple[Tuple[Tuple[str, str], ...], Tuple[str, ...], Dict[str, Any]]:
+        """一次性获取引用元组、去重URL元组和分析过程，供界面展示使用"""
+        _, citations, urls, successful = self._search_summary()
+        analysis_process = {
+            "search_queries": self.search_history,
+            "web_research_results": self.web_research_results,
+            "reflection_results": self.reflection_results,
+            "search_results_count": len(self.search_results),
+            "successful_searches": successful
+        }
+        return citations, urls, analysis_process
+    
     # 分析过程管理（参考原始backend结构）
     def add_web_research_result(self, result: str):
         """添加网络搜索结果到分析过程"""
@@ -460,6 +499,7 @@ class StateManager:
         self.search_results.clear()
         self.search_history.clear()
         self.current_search_round = 0
+        self._search_summary_cache = None
         
         # 清除步骤和上下文数据
         self.step_results.clear()
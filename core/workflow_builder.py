@@ -15,7 +15,8 @@ except ImportError:
     Client = None
 
 from utils.prompts import PromptTemplates
-from utils.helpers import extract_json_from_text, safe_json_loads
+from utils.helpers import extract_json_from_text, safe_json_loads, logger
+from .search_agent import get_shared_client
 
 
 class WorkflowStep:
@@ -130,7 +131,7 @@ class DynamicWorkflow:
         step_name = step_config["name"]
         step_description = step_config["description"]
         
-        print(f"开始执行步骤: {step_name} - {step_description}")
+        logger.info(f"开始执行步骤: {step_name} - {step_description}")
         
         # 创建步骤实例
         step = WorkflowStep(step_name, step_description, self._get_step_function(step_name), **context)
@@ -139,11 +140,11 @@ class DynamicWorkflow:
             # 执行步骤
             step_result = await step.execute(context)
             
-            print(f"步骤 {step_name} 执行完成")
+            logger.info(f"步骤 {step_name} 执行完成")
             return step_result
             
         except Exception as e:
-            print(f"步骤 {step_name} 执行失败: {e}")
+            logger.error(f"步骤 {step_name} 执行失败: {e}")
             raise e
 
     def _get_step_function(self, step_name: str) -> Callable:
@@ -164,7 +165,7 @@ class DynamicWorkflowBuilder:
         self.client = None
         
         if Client:
-            self.client = Client(api_key=api_key)
+            self.client = get_shared_client(api_key)
     
     async def analyze_task_and_build_workflow(self, user_query: str) -> DynamicWorkflow:
         """
@@ -186,17 +187,17 @@ class DynamicWorkflowBuilder:
     
     async def _analyze_task_type(self, user_query: str) -> Dict[str, Any]:
         """分析任务类型"""
-        print(f"开始分析任务类型: {user_query[:50]}...")
+        logger.info(f"开始分析任务类型: {user_query[:50]}...")
         
         if not self.client:
-            print("没有可用的客户端，使用默认分析")
+            logger.info("没有可用的客户端，使用默认分析")
             return self._get_default_task_analysis(user_query)
         
         try:
-            print("生成任务分析提示词...")
+            logger.info("生成任务分析提示词...")
             prompt = PromptTemplates.task_analysis_prompt(user_query)
             
-            print("调用Gemini API进行任务分析...")
+            logger.info("调用Gemini API进行任务分析...")
             
             # 确保prompt是UTF-8编码的字符串
             if isinstance(prompt, str):
@@ -204,13 +205,12 @@ class DynamicWorkflowBuilder:
             else:
                 prompt_content = str(prompt)
             
-            # 使用模型配置获取合适的模型和token限制
+            # 模型使用构建器自身的配置（全局配置可能已被其他会话切换），token限制与模型无关
             from core.model_config import get_model_config
-            model_config = get_model_config()
-            task_model = model_config.get_model_for_task("task_analysis")
-            max_tokens = model_config.get_token_limits("task_analysis")
+            task_model = self.model_name
+            max_tokens = get_model_config().get_token_limits("task_analysis")
             
-            response = self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model=task_model,
                 contents=prompt_content,
                 config=GenerateContentConfig(
@@ -219,27 +219,27 @@ class DynamicWorkflowBuilder:
                 )
             )
             
-            print("API调用完成，解析响应...")
+            logger.info("API调用完成，解析响应...")
             
             if response and response.text:
-                print(f"收到响应: {response.text[:200]}...")
+                logger.info(f"收到响应: {response.text[:200]}...")
                 analysis = extract_json_from_text(response.text)
                 if analysis:
-                    print("任务分析成功")
+                    logger.info("任务分析成功")
                     return analysis
                 else:
-                    print("JSON解析失败，使用默认分析")
+                    logger.warning("JSON解析失败，使用默认分析")
             else:
-                print("空响应，使用默认分析")
+                logger.info("空响应，使用默认分析")
             
         except Exception as e:
-            print(f"任务分析失败: {e}，使用默认分析")
+            logger.warning(f"任务分析失败: {e}，使用默认分析")
         
         return self._get_default_task_analysis(user_query)
     
     def _get_default_task_analysis(self, user_query: str) -> Dict[str, Any]:
         """获取默认任务分析（当AI分析失败时的fallback）"""
-        print(f"Fallback: 使用默认深度研究模式用于查询: {user_query}")
+        logger.info(f"Fallback: 使用默认深度研究模式用于查询: {user_query}")
         
         # 简单fallback - 默认使用深度研究模式
         return {
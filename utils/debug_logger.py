@@ -1,10 +1,29 @@
 import json
 import os
 import time
+import threading
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from utils.helpers import logger
+
+
+# 控制台输出中步骤状态对应的图标
+_STEP_STATUS_ICON = {"completed": "✅", "running": "🔄", "failed": "❌"}
+
+
+def _dump_json(data) -> bytes:
+    """序列化为带缩进的UTF-8 JSON字节，安装了orjson时使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
 
 class DebugLogger:
     """Debug日志记录器 - 记录API请求和响应数据"""
@@ -13,6 +32,8 @@ class DebugLogger:
         self.enabled = enabled
         self.output_dir = Path(output_dir)
         self.current_session = None
+        # 保存可能在后台线程执行，避免两次保存同时写同一个文件
+        self._save_lock = threading.Lock()
         self.session_data = {
             "session_info": {},
             "api_requests": [],
@@ -42,7 +63,7 @@ class DebugLogger:
             "platform": None
         }
         
-        print(f"🐛 Debug模式已启用 - 会话ID: {self.current_session}")
+        logger.info(f"🐛 Debug模式已启用 - 会话ID: {self.current_session}")
     
     def enable(self, output_dir: str = "debug_logs"):
         """启用debug模式"""
@@ -191,7 +212,7 @@ class DebugLogger:
         }
         
         self.session_data["workflow_steps"].append(step_data)
-        status_icon = {"completed": "✅", "running": "🔄", "failed": "❌"}.get(step_status, "❓")
+        status_icon = _STEP_STATUS_ICON.get(step_status, "❓")
         
         # 更详细的控制台输出
         step_info = f"{step_name}"
@@ -382,7 +403,7 @@ class DebugLogger:
     
     def _log_to_console(self, category: str, identifier: str, status: str):
         """输出到控制台"""
-        print(f"🐛 {category}: {identifier} - {status}")
+        logger.info(f"🐛 {category}: {identifier} - {status}")
     
     def _save_session(self):
         """保存会话数据到文件"""
@@ -396,20 +417,21 @@ class DebugLogger:
         output_file = self.output_dir / f"{self.current_session}.json"
         
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.session_data, f, ensure_ascii=False, indent=2)
-            
-            print(f"🐛 Debug数据已保存到: {output_file}")
-            
-            # 生成摘要文件
-            summary_file = self.output_dir / f"{self.current_session}_summary.json"
-            with open(summary_file, 'w', encoding='utf-8') as f:
-                json.dump(self.get_session_summary(), f, ensure_ascii=False, indent=2)
-            
-            print(f"🐛 会话摘要已保存到: {summary_file}")
+            with self._save_lock:
+                with open(output_file, 'wb') as f:
+                    f.write(_dump_json(self.session_data))
+                
+                logger.info(f"🐛 Debug数据已保存到: {output_file}")
+                
+                # 生成摘要文件
+                summary_file = self.output_dir / f"{self.current_session}_summary.json"
+                with open(summary_file, 'wb') as f:
+                    f.write(_dump_json(self.get_session_summary()))
+                
+                logger.info(f"🐛 会话摘要已保存到: {summary_file}")
             
         except Exception as e:
-            print(f"🐛 保存debug数据失败: {e}")
+            logger.error(f"🐛 保存debug数据失败: {e}")
     
     def save_now(self):
         """立即保存当前会话数据"""
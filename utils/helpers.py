@@ -5,11 +5,29 @@
 
 import re
 import json
+import queue
+import atexit
 import asyncio
+import logging
+import logging.handlers
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
 
+# 运行日志先放进队列，由后台监听线程统一写到控制台，调用方不等待I/O
+logger = logging.getLogger("deepsearch")
+if not logger.handlers:
+    _log_queue = queue.Queue(-1)
+    _console_handler = logging.StreamHandler()
+    _console_handler.setFormatter(logging.Formatter("%(message)s"))
+    _log_listener = logging.handlers.QueueListener(_log_queue, _console_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
 def clean_text(text: str) -> str:
     """清理文本，移除多余的空白字符"""
     if not text:
@@ -112,6 +130,32 @@ def format_time_duration(seconds: float) -> str:
         return f"{minutes:.0f}m {remaining_seconds:.1f}s"
 
 
+_task_time_cache: Dict[str, str] = {}
+
+
+def format_task_time(task_id: str) -> str:
+    """从task_id（task_YYYYMMDD_HHMMSS...）中提取时间并格式化，按时间戳缓存"""
+    if not task_id or not task_id.startswith("task_") or len(task_id) < 20:
+        return "未知时间"
+    
+    s = task_id[5:20]  # YYYYMMDD_HHMMSS 部分
+    cached = _task_time_cache.get(s)
+    if cached is not None:
+        return cached
+    
+    # 格式固定，直接按偏移切片，避免strptime逐字符解释格式串
+    if s[8] == "_" and s[:8].isdigit() and s[9:].isdigit():
+        display = f"{s[0:4]}-{s[4:6]}-{s[6:8]} {s[9:11]}:{s[11:13]}:{s[13:15]}"
+    else:
+        try:
+            display = datetime.strptime(s, "%Y%m%d_%H%M%S").strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            display = "未知时间"
+    
+    _task_time_cache[s] = display
+    return display
+
+
 def validate_api_key(api_key: str) -> bool:
     """验证API密钥格式"""
     if not api_key or api_key == "your_gemini_api_key_here":
@@ -124,6 +168,24 @@ def validate_api_key(api_key: str) -> bool:
     return True
 
 
+def truncate_json(obj: Any, max_depth: int = 2, max_list: int = 10, max_str: int = 200) -> Any:
+    """裁剪嵌套结构用于预览：限制深度、列表长度和字符串长度"""
+    if isinstance(obj, dict):
+        if max_depth <= 0:
+            return f"{{...{len(obj)} 项}}"
+        return {k: truncate_json(v, max_depth - 1, max_list, max_str) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        if max_depth <= 0:
+            return f"[...{len(obj)} 项]"
+        items = [truncate_json(v, max_depth - 1, max_list, max_str) for v in obj[:max_list]]
+        if len(obj) > max_list:
+            items.append(f"...另有 {len(obj) - max_list} 项")
+        return items
+    if isinstance(obj, str):
+        return truncate_text(obj, max_str)
+    return obj
+
+
 def safe_json_loads(text: str, default: Any = None) -> Any:
     """安全的JSON解析"""
     try:
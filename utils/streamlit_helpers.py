@@ -8,93 +8,179 @@ import json
 from datetime import datetime
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def json_serializable(obj):
-    """将对象转换为JSON可序列化的格式"""
-    # 处理dataclass对象
-    if hasattr(obj, '__dataclass_fields__'):
-        from dataclasses import asdict
-        return json_serializable(asdict(obj))
-    elif hasattr(obj, '__dict__'):
-        return {k: json_serializable(v) for k, v in obj.__dict__.items()}
-    elif isinstance(obj, Enum):
-        return obj.value
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    elif isinstance(obj, (list, tuple)):
-        return [json_serializable(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: json_serializable(value) for key, value in obj.items()}
-    else:
-        return obj
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def markdown_table(headers, rows):
+    """生成Markdown表格文本，用一次st.markdown代替逐行的st.text"""
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "|" + "---|" * len(headers),
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(str(cell).replace("|", "\\|") for cell in row) + " |")
+    return "\n".join(lines)
 
 
 def create_markdown_content(research_results):
     """创建Markdown格式的研究报告"""
-    final_answer = research_results.get("final_answer", "")
-    user_query = research_results.get("user_query", "")
-    task_id = research_results.get("task_id", "")
+    # 各字段只读取一次；None与缺失同样按空值处理
+    final_answer = research_results.get("final_answer") or ""
+    user_query = research_results.get("user_query") or ""
+    task_id = research_results.get("task_id") or ""
+    citations = research_results.get("citations") or ()
+    urls = research_results.get("urls") or ()
+    search_results = research_results.get("search_results") or ()
+    task_summary = research_results.get("task_summary") or {}
     
-    markdown_content = f"# 🔍 DeepSearch 研究报告\n\n"
-    markdown_content += f"**研究主题:** {user_query}\n\n"
-    markdown_content += f"**任务ID:** {task_id}\n\n"
-    markdown_content += "---\n\n"
+    # 逐段追加到列表，最后一次性拼接
+    parts = [f"# 🔍 DeepSearch 研究报告\n\n"]
+    parts.append(f"**研究主题:** {user_query}\n\n")
+    parts.append(f"**任务ID:** {task_id}\n\n")
+    parts.append("---\n\n")
     
     # 添加主要研究结果
     if final_answer:
-        markdown_content += "## 📋 研究结果\n\n"
-        markdown_content += final_answer
-        markdown_content += "\n\n"
+        parts.append("## 📋 研究结果\n\n")
+        parts.append(final_answer)
+        parts.append("\n\n")
     
     # 添加引用来源
-    citations = research_results.get("citations", [])
     if citations:
-        markdown_content += "## 📚 引用来源\n\n"
+        parts.append("## 📚 引用来源\n\n")
         for i, citation in enumerate(citations[:10], 1):
             title = citation.get("title", f"来源 {i}")
             url = citation.get("url", "#")
-            markdown_content += f"{i}. [{title}]({url})\n"
-        markdown_content += "\n"
+            parts.append(f"{i}. [{title}]({url})\n")
+        parts.append("\n")
     
     # 添加相关链接
-    urls = research_results.get("urls", [])
     if urls:
-        markdown_content += "## 🔗 相关链接\n\n"
+        parts.append("## 🔗 相关链接\n\n")
         for url in urls[:10]:
-            markdown_content += f"- {url}\n"
-        markdown_content += "\n"
+            parts.append(f"- {url}\n")
+        parts.append("\n")
     
     # 添加搜索统计
-    search_results = research_results.get("search_results", [])
     if search_results:
-        markdown_content += f"## 📊 研究统计\n\n"
-        markdown_content += f"- 搜索次数：{len(search_results)}\n"
-        # 正确处理SearchResult对象
-        successful_searches = len([r for r in search_results if (r.success if hasattr(r, 'success') else r.get('success', False))])
-        markdown_content += f"- 成功搜索：{successful_searches}\n"
-        total_citations = sum(len(r.citations if hasattr(r, 'citations') else r.get('citations', [])) for r in search_results)
-        markdown_content += f"- 总引用数：{total_citations}\n\n"
+        parts.append(f"## 📊 研究统计\n\n")
+        # 一次遍历同时统计成功数和引用数，兼容SearchResult对象和字典
+        successful_searches = total_citations = 0
+        for r in search_results:
+            if isinstance(r, dict):
+                successful_searches += bool(r.get('success', False))
+                total_citations += len(r.get('citations', []))
+            else:
+                successful_searches += bool(r.success)
+                total_citations += len(r.citations)
+        parts.append(f"- 搜索次数：{len(search_results)}\n")
+        parts.append(f"- 成功搜索：{successful_searches}\n")
+        parts.append(f"- 总引用数：{total_citations}\n\n")
     
     # 添加任务摘要
-    task_summary = research_results.get("task_summary", {})
     if task_summary:
-        markdown_content += "## ⚙️ 任务信息\n\n"
+        parts.append("## ⚙️ 任务信息\n\n")
         if "task_id" in task_summary:
-            markdown_content += f"- 任务ID：{task_summary['task_id']}\n"
+            parts.append(f"- 任务ID：{task_summary['task_id']}\n")
         if "duration" in task_summary:
             duration = task_summary["duration"]
-            markdown_content += f"- 执行时长：{duration:.1f}秒\n"
+            parts.append(f"- 执行时长：{duration:.1f}秒\n")
         if "status" in task_summary:
             status = task_summary["status"]
             if isinstance(status, Enum):
                 status = status.value
-            markdown_content += f"- 执行状态：{status}\n"
+            parts.append(f"- 执行状态：{status}\n")
     
     # 添加生成时间
-    markdown_content += f"\n---\n\n*报告生成时间：{datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}*\n"
-    markdown_content += "*由 🔍 DeepSearch 智能研究助手生成*"
+    parts.append(f"\n---\n\n*报告生成时间：{datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}*\n")
+    parts.append("*由 🔍 DeepSearch 智能研究助手生成*")
     
-    return markdown_content
+    return "".join(parts)
+
+
+def _orjson_default(obj):
+    """orjson无法直接处理的对象：返回其属性字典，嵌套值仍由orjson处理"""
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class _FallbackEncoder(json.JSONEncoder):
+    """未安装orjson时使用：容器由C编码器遍历，只有枚举、时间和普通对象回调到Python"""
+    
+    def default(self, o):
+        if isinstance(o, Enum):
+            return o.value
+        if isinstance(o, datetime):
+            return o.isoformat()
+        if hasattr(o, '__dict__'):
+            return o.__dict__
+        return super().default(o)
+
+
+def json_serializable_bytes(obj, indent=False):
+    """将对象直接序列化为UTF-8 JSON字节，优先使用orjson，未安装时使用_FallbackEncoder"""
+    if orjson is not None:
+        # orjson原生处理dataclass、枚举和datetime，其余对象按属性字典序列化
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_orjson_default, option=option)
+    return json.dumps(
+        obj, cls=_FallbackEncoder, ensure_ascii=False, indent=2 if indent else None
+    ).encode("utf-8")
+
+
+# 每个会话最多缓存几个任务的导出内容
+EXPORT_CACHE_SIZE = 8
+
+
+def _export_cache_entry(task_id):
+    """取本会话中task_id对应的导出缓存；缓存放在session_state里，不同用户之间互不可见"""
+    cache = st.session_state.setdefault("_export_cache", {})
+    entry = cache.get(task_id)
+    if entry is None:
+        entry = cache[task_id] = {}
+        # 按插入顺序淘汰最早的任务，保持缓存有界
+        while len(cache) > EXPORT_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+    return entry
+
+
+def get_export_json(task_id, research_results):
+    """按task_id缓存导出用的缩进JSON字节，便于直接阅读（结果完成后不再变化）"""
+    entry = _export_cache_entry(task_id)
+    if "json" not in entry:
+        entry["json"] = json_serializable_bytes(research_results, indent=True)
+    return entry["json"]
+
+
+def get_export_json_zst(task_id, research_results):
+    """按task_id缓存zstd压缩后的紧凑JSON（不缩进），未安装zstandard时返回None"""
+    if zstandard is None:
+        return None
+    entry = _export_cache_entry(task_id)
+    if "zst" not in entry:
+        # 压缩器对象不能跨线程共用，每次新建（只在缓存未命中时发生）
+        compressor = zstandard.ZstdCompressor(level=3)
+        entry["zst"] = compressor.compress(json_serializable_bytes(research_results))
+    return entry["zst"]
+
+
+def get_export_markdown(task_id, research_results):
+    """按task_id缓存导出用的Markdown报告"""
+    entry = _export_cache_entry(task_id)
+    if "markdown" not in entry:
+        entry["markdown"] = create_markdown_content(research_results)
+    return entry["markdown"]
 
 
 def display_task_analysis(workflow_analysis, task_id):
@@ -129,6 +215,68 @@ def display_task_analysis(workflow_analysis, task_id):
         st.text_area("分析推理", reasoning, height=100, disabled=True, key=f"reasoning_{task_id}")
 
 
+def _search_result_fields(result):
+    """统一读取SearchResult对象或字典中的显示字段，返回可哈希的元组（内容只保留预览部分）"""
+    if hasattr(result, 'query'):  # SearchResult对象
+        query, success, duration = result.query, result.success, result.duration
+        content, citations, error = result.content, result.citations, result.error
+    else:  # 字典格式
+        query = result.get("query", "未知查询")
+        success = result.get("success", False)
+        duration = result.get("duration", 0)
+        content = result.get("content", "")
+        citations = result.get("citations", [])
+        error = result.get("error", "未知错误")
+    
+    # 表格只显示前200个字符；截断后再作为缓存键，避免每次重跑都对完整正文做哈希
+    content = content or ""
+    content_preview = content[:200] + "..." if len(content) > 200 else content
+    citations = citations or []
+    citation_pairs = tuple(
+        (citation.get("title", "未知标题"), citation.get("url", "#"))
+        for citation in citations[:3]
+    )
+    return (query, success, duration, content_preview, citation_pairs, len(citations), error)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _preview_search_results(results_tuple):
+    """预先生成搜索结果的显示内容：(查询, 成功, 耗时, 内容预览, 引用Markdown, 引用数, 错误)"""
+    previews = []
+    for query, success, duration, content_preview, citation_pairs, n_citations, error in results_tuple:
+        citation_md = "\n".join(
+            f"- [{title}]({url})" if title and title != "未知标题" else f"- {url}"
+            for title, url in citation_pairs
+        )
+        previews.append((query, success, duration, content_preview, citation_md, n_citations, error))
+    return previews
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _search_results_frame(results_tuple):
+    """搜索结果概览表（DataFrame），与预览内容一同按结果缓存"""
+    import pandas as pd
+    return pd.DataFrame([
+        {
+            "查询": query,
+            "状态": "✅ 成功" if success else f"❌ {error}",
+            "耗时(s)": round(duration or 0, 2),
+            "内容预览": content_preview,
+            "引用数": n_citations,
+        }
+        for query, success, duration, content_preview, _, n_citations, error in _preview_search_results(results_tuple)
+    ])
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _format_citations(citations_tuple):
+    """把(标题, URL)元组列表预先渲染为编号的Markdown引用列表"""
+    return "\n\n".join(
+        f"**{i}.** [{title}]({url})" if title and title != "未知标题" else f"**{i}.** {url}"
+        for i, (title, url) in enumerate(citations_tuple, 1)
+    )
+
+
 def display_search_results(research_results):
     """显示搜索结果"""
     if not research_results or not research_results.get("search_results"):
@@ -136,49 +284,33 @@ def display_search_results(research_results):
     
     search_results = research_results["search_results"]
     task_id = research_results.get("task_id", "default")
+    results_tuple = tuple(_search_result_fields(r) for r in search_results)
     
     st.markdown(f"### 🔍 搜索结果 ({len(search_results)}) ({task_id[:20]})")
-    for i, result in enumerate(search_results, 1):
-        with st.container():
-            # 正确处理SearchResult对象和字典
-            if hasattr(result, 'query'):  # SearchResult对象
-                query = result.query
-                success = result.success
-                duration = result.duration
-                content = result.content
-                citations = result.citations
-                error = result.error
-            else:  # 字典格式
-                query = result.get("query", "未知查询")
-                success = result.get("success", False)
-                duration = result.get("duration", 0)
-                content = result.get("content", "")
-                citations = result.get("citations", [])
-                error = result.get("error", "未知错误")
-            
-            st.markdown(f"**搜索 {i}: {query}**")
-            
-            if success:
-                st.success(f"✅ 搜索成功 (耗时: {duration:.2f}秒)")
-                
-                if content:
-                    content_preview = content[:200] + "..." if len(content) > 200 else content
-                    st.text_area(f"内容预览", content_preview, height=100, disabled=True, key=f"content_{task_id}_{i}")
-                
-                if citations:
-                    st.markdown("**引用来源:**")
-                    citations_list = citations or []
-                    for j, citation in enumerate(citations_list[:3]):
-                        title = citation.get("title", "未知标题")
-                        url = citation.get("url", "#")
-                        if title and title != "未知标题":
-                            st.markdown(f"- [{title}]({url})")
-                        else:
-                            st.markdown(f"- {url}")
-            else:
-                st.error(f"❌ 搜索失败: {error}")
-            
-            st.divider()
+    event = st.dataframe(
+        _search_results_frame(results_tuple),
+        hide_index=True,
+        use_container_width=True,
+        column_config={"内容预览": st.column_config.TextColumn(width="large")},
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"search_table_{task_id}",
+    )
+    
+    # 选中某一行时才显示该搜索的引用来源
+    selected_rows = event.selection.rows
+    if selected_rows:
+        query, success, _, content_preview, citation_md, _, error = _preview_search_results(results_tuple)[selected_rows[0]]
+        st.markdown(f"**{query}**")
+        if not success:
+            st.error(f"❌ 搜索失败: {error}")
+        elif citation_md:
+            st.markdown("**引用来源:**")
+            st.markdown(citation_md)
+        else:
+            st.caption("该搜索没有引用来源")
+    else:
+        st.caption("点击表格中的一行查看引用来源")
 
 
 def display_final_answer(research_results, index=None):
@@ -208,7 +340,11 @@ def display_final_answer(research_results, index=None):
         # 根据状态显示或隐藏markdown预览
         if st.session_state.get(f"show_markdown_{unique_key}", False):
             try:
-                markdown_content = create_markdown_content(research_results)
+                # 与侧边栏导出共用按task_id缓存的报告，反复切换预览时不再重新拼接
+                if research_results.get("task_id"):
+                    markdown_content = get_export_markdown(task_id, research_results)
+                else:
+                    markdown_content = create_markdown_content(research_results)
                 st.code(markdown_content, language="markdown")
                 st.success("✅ Markdown报告已生成，请从上方复制代码块中的内容。")
             except Exception as e:
@@ -217,20 +353,22 @@ def display_final_answer(research_results, index=None):
         # 显示主要研究结果
         st.markdown(final_answer)
         
-        # 从StateManager获取引用和来源
+        # 从StateManager获取引用和来源（元组形式，可直接作为缓存键）
         if st.session_state.research_engine:
-            citations = st.session_state.research_engine.state_manager.get_all_citations()
-            urls = st.session_state.research_engine.state_manager.get_unique_urls()
-            analysis_process = st.session_state.research_engine.state_manager.get_analysis_process()
+            citations, urls, analysis_process = st.session_state.research_engine.state_manager.snapshot()
         else:
-            citations = []
-            urls = []
+            citations = ()
+            urls = ()
             analysis_process = {}
         
         # 显示分析过程（参考原始backend结构）
+        # tabs的内容每次rerun都会全部渲染，默认收起，用户打开开关时才生成
+        show_analysis = False
         if analysis_process:
-            # 使用容器和tabs来避免嵌套expander问题
             st.markdown(f"### 🔬 分析过程 ({task_id[:20]})")
+            show_analysis = st.toggle("展开分析过程", value=False, key=f"show_analysis_{unique_key}")
+        if show_analysis:
+            # 使用容器和tabs来避免嵌套expander问题
             tab1, tab2, tab3, tab4 = st.tabs([
                 "搜索查询", 
                 "搜索结果", 
@@ -268,7 +406,12 @@ def display_final_answer(research_results, index=None):
                     st.markdown("**分析反思:**")
                     for i, reflection in enumerate(reflection_results, 1):
                         st.markdown(f"**分析 {i}:**")
-                        st.json(reflection)
+                        # 大段反思结果用代码块显示，比st.json的交互式树渲染轻得多
+                        if orjson is not None:
+                            reflection_text = orjson.dumps(reflection, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+                        else:
+                            reflection_text = json.dumps(reflection, ensure_ascii=False, indent=2)
+                        st.code(reflection_text, language="json")
                         st.divider()
                 else:
                     st.info("暂无分析反思记录")
@@ -286,17 +429,10 @@ def display_final_answer(research_results, index=None):
             st.markdown(f"### 📚 引用和来源 ({task_id[:20]})")
             if citations:
                 st.markdown("**引用来源:**")
-                for i, citation in enumerate(citations, 1):
-                    url = citation.get("url", "#")
-                    title = citation.get("title", "未知标题")
-                    if title and title != "未知标题":
-                        st.markdown(f"**{i}.** [{title}]({url})")
-                    else:
-                        st.markdown(f"**{i}.** {url}")
+                st.markdown(_format_citations(citations))
                 st.divider()
             
             if urls:
                 st.markdown("**相关链接:**")
-                urls_list = urls or []
-                for url in urls_list[:10]:
+                for url in urls[:10]:
                     st.markdown(f"- {url}")